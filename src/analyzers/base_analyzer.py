@@ -1,12 +1,26 @@
 from abc import ABC, abstractmethod
 from typing import Any
 
+from model_manager import ModelManager
+
 
 class BaseAnalyzer(ABC):
     @abstractmethod
     async def analyze(self, context: dict[str, Any]) -> str:
         pass
 
+    @abstractmethod
+    def record_outcome(self, outcome: str) -> None:
+        """Remember the result of the last decision (used by stateful analyzers)."""
+
+    @abstractmethod
+    def reset(self) -> None:
+        """Forget any per-task state."""
+
+    @abstractmethod
+    def fork(self, model_manager: ModelManager) -> "BaseAnalyzer":
+        """Return an analyzer with the same settings and fresh state that uses the given model manager."""
+
     async def is_task_completed(self, task: str, current_url: str) -> bool:
         prompt = f"""Task: {task}
 Current URL: {current_url}
@@ -22,6 +36,7 @@ Is the task completed? Respond with 'Yes' if the task is completed, or 'No' if i
                     },
                     {"role": "user", "content": prompt},
                 ],
+                call_site="task_completion",
             )
             return completion.strip().lower() == "yes"
         except Exception as e:
@@ -1,18 +1,55 @@
 from typing import Any
 
 from model_manager import ModelManager
-from utils import extract_key_value_pairs, format_prompt, get_logger, load_prompt
+from utils import estimate_tokens, extract_key_value_pairs, format_prompt, get_logger, load_prompt
 
 from .base_analyzer import BaseAnalyzer
 
 
 class TextAnalyzer(BaseAnalyzer):
-    def __init__(self, model_manager: ModelManager) -> None:
+    def __init__(
+        self,
+        model_manager: ModelManager,
+        *,
+        conversational: bool = False,
+        history_token_budget: int = 3000,
+        degraded_element_limit: int = 50,
+        scrolling: bool = False,
+    ) -> None:
         self.model_manager = model_manager
         self.logger = get_logger()
         self.prompt_template = load_prompt("text_analyzer")
+        self.conversational = conversational
+        self.history_token_budget = history_token_budget
+        self.degraded_element_limit = degraded_element_limit
+        # Only offer scrolling when the element map is windowed; otherwise it never reveals anything new.
+        self.scrolling = scrolling
+        self.reset()
+
+    def fork(self, model_manager: ModelManager) -> "TextAnalyzer":
+        return TextAnalyzer(
+            model_manager,
+            conversational=self.conversational,
+            history_token_budget=self.history_token_budget,
+            degraded_element_limit=self.degraded_element_limit,
+            scrolling=self.scrolling,
+        )
+
+    def reset(self) -> None:
+        self.turns: list[dict[str, str]] = []
+        self.summary: list[str] = []
+        self.previous_elements: dict[int, str] | None = None
+        self.last_outcome = "No previous action."
+
+    def record_outcome(self, outcome: str) -> None:
+        self.last_outcome = outcome
+        if self.turns:
+            self.turns[-1]["outcome"] = outcome
 
     async def analyze(self, context: dict[str, Any]) -> str:
+        if self.conversational:
+            return await self._analyze_conversational(context)
+
         prompt = self.generate_prompt(context)
         try:
             decision = await self.model_manager.get_completion(
@@ -20,12 +57,88 @@ class TextAnalyzer(BaseAnalyzer):
                     {"role": "system", "content": prompt["system_message"]},
                     {"role": "user", "content": prompt["user_message"]},
                 ],
+                call_site="decision",
             )
             return decision
         except Exception as e:
             self.logger.exception("Error with AI model: %s", str(e))
             return None
 
+    async def _analyze_conversational(self, context: dict[str, Any]) -> str:
+        """Continue the running conversation, sending only element changes after the first step."""
+        elements = self.describe_elements(context["mapped_elements"])
+        user_message = self.generate_delta_message(context, elements) if self.previous_elements is not None else None
+        if user_message is None:
+            user_message = self.generate_prompt(context)["user_message"]
+
+        system_message = self.prompt_template["system_message"]
+        if self.summary:
+            system_message += "\nEarlier steps of this task:\n" + "\n".join(self.summary)
+
+        messages = [{"role": "system", "content": system_message}]
+        for turn in self.turns:
+            messages.append({"role": "user", "content": turn["user"]})
+            messages.append({"role": "assistant", "content": turn["assistant"]})
+        messages.append({"role": "user", "content": user_message})
+
+        try:
+            decision = await self.model_manager.get_completion(messages, call_site="decision")
+        except Exception:
+            self.logger.exception("Error with AI model")
+            return None
+
+        if decision:
+            self.turns.append(
+                {"user": user_message, "assistant": decision, "url": context["current_url"], "outcome": ""},
+            )
+            self.previous_elements = elements
+            self._compress_history()
+        return decision
+
+    def _compress_history(self) -> None:
+        """Fold the oldest turns into one-line summaries once the history exceeds its token budget."""
+        token_budget = self.history_token_budget // 2 if self.model_manager.degraded else self.history_token_budget
+        while len(self.turns) > 1 and self._history_tokens() > token_budget:
+            turn = self.turns.pop(0)
+            self.summary.append(
+                f"- At {turn['url']} you decided '{turn['assistant']}' -> {turn['outcome'] or 'unknown result'}",
+            )
+            # The dropped turn may have held the only full element list, so resend it next time.
+            self.previous_elements = None
+
+    def _history_tokens(self) -> int:
+        return sum(estimate_tokens(turn["user"]) + estimate_tokens(turn["assistant"]) for turn in self.turns)
+
+    def generate_delta_message(self, context: dict[str, Any], elements: dict[int, str]) -> str | None:
+        """Describe what changed since the previous element map, or None if a full list is cheaper."""
+        previous = self.previous_elements
+        added = [f"+ {num}: {line}" for num, line in elements.items() if num not in previous]
+        removed = [f"- {num}" for num in previous if num not in elements]
+        changed = [f"~ {num}: {line}" for num, line in elements.items() if num in previous and previous[num] != line]
+        delta = added + changed + removed
+        if len(delta) >= len(elements):
+            return None
+
+        plugin_info = "\n".join(f"- {key}: {value}" for key, value in context["plugin_data"].items())
+        return self.prompt_template["delta_message"].format(
+            outcome=self.last_outcome,
+            current_url=context["current_url"],
+            elements_delta="\n".join(delta) or "No changes.",
+            plugin_info=plugin_info,
+            progress_note=context.get("progress_note", ""),
+        )
+
+    def describe_elements(self, mapped_elements: dict[int, Any]) -> dict[int, str]:
+        items = list(mapped_elements.items())
+        if self.model_manager.degraded and len(items) > self.degraded_element_limit:
+            # Prefer form fields over links when the prompt has to shrink.
+            items.sort(key=lambda item: item[1]["type"] == "clickable")
+            items = sorted(items[: self.degraded_element_limit])
+        lines = getattr(mapped_elements, "prompt_lines", None)
+        if lines is not None:
+            return {num: lines[num] for num, _ in items}
+        return {num: f"{info['description']} ({info['type']})" for num, info in items}
+
     def generate_prompt(self, context: dict[str, Any]) -> dict[str, str]:
         mapped_elements = context["mapped_elements"]
         task = context["task"]
@@ -33,7 +146,7 @@ class TextAnalyzer(BaseAnalyzer):
         plugin_data = context["plugin_data"]
 
         elements_description = "\n".join(
-            f"{num}: {info['description']} ({info['type']})" for num, info in mapped_elements.items()
+            f"{num}: {line}" for num, line in self.describe_elements(mapped_elements).items()
         )
 
         task_info = extract_key_value_pairs(task)
@@ -48,6 +161,8 @@ class TextAnalyzer(BaseAnalyzer):
             elements_description=elements_description,
             task_instructions=task_instructions,
             plugin_info=plugin_info,
+            progress_note=context.get("progress_note", ""),
+            scroll_instruction=self.prompt_template["scroll_instruction"] if self.scrolling else "",
         )
 
     async def is_task_completed(self, task: str, current_url: str) -> bool:
@@ -65,6 +180,7 @@ Is the task completed? Respond with 'Yes' if the task is completed, or 'No' if i
                     },
                     {"role": "user", "content": prompt},
                 ],
+                call_site="task_completion",
             )
             return completion.strip().lower() == "yes"
         except Exception as e:
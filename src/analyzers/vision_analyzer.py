@@ -16,6 +16,15 @@ class VisionAnalyzer(BaseAnalyzer):
         # TODO: Implement vision analysis
         pass
 
+    def record_outcome(self, outcome: str) -> None:
+        pass
+
+    def reset(self) -> None:
+        pass
+
+    def fork(self, model_manager: ModelManager) -> "VisionAnalyzer":
+        return VisionAnalyzer(model_manager)
+
     def generate_prompt(self, context: dict[str, Any]) -> dict[str, str]:
         # TODO: Implement prompt generation for vision analysis
         pass
@@ -0,0 +1,135 @@
+import time
+from collections import defaultdict
+
+from utils import get_logger
+
+
+# USD per million tokens (input, output), used when litellm cannot price a response.
+PRICE_TABLE: dict[str, tuple[float, float]] = {
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4o-mini": (0.15, 0.60),
+    "groq/llama3-70b-8192": (0.59, 0.79),
+    "groq/llama3-8b-8192": (0.05, 0.08),
+}
+
+BUDGET_KEYS = ("steps", "tokens", "cost", "time")
+
+
+class BudgetExceededError(Exception):
+    """Raised when a task or batch runs out of budget."""
+
+
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int) -> float:
+    """Price a call from the static table; unknown models are counted as free."""
+    input_price, output_price = PRICE_TABLE.get(model, (0.0, 0.0))
+    return (prompt_tokens * input_price + completion_tokens * output_price) / 1_000_000
+
+
+def parse_budget(spec: str | None) -> dict[str, float]:
+    """
+    Parse a budget specification such as ``steps=30,tokens=200000,cost=1.5,time=600``.
+
+    Parameters
+    ----------
+    spec : str | None
+        Comma-separated ``key=value`` pairs. Keys are steps, tokens, cost (USD) and time (seconds).
+
+    Returns
+    -------
+    dict[str, float]
+        The parsed limits.
+    """
+    limits: dict[str, float] = {}
+    if not spec:
+        return limits
+    for part in spec.split(","):
+        key, _, value = part.partition("=")
+        key = key.strip()
+        if key not in BUDGET_KEYS:
+            msg = f"Unknown budget key '{key}'. Expected one of: {', '.join(BUDGET_KEYS)}"
+            raise ValueError(msg)
+        limits[key] = float(value)
+    return limits
+
+
+class BudgetTracker:
+    """Accounts steps, tokens, dollars and wall time against optional limits."""
+
+    def __init__(
+        self,
+        limits: dict[str, float] | None = None,
+        parent: "BudgetTracker | None" = None,
+        degrade_at: float = 0.8,
+    ) -> None:
+        self.logger = get_logger()
+        self.limits = limits or {}
+        self.parent = parent
+        self.degrade_at = degrade_at
+        self.started_at = time.monotonic()
+        self.steps = 0
+        self.tokens = 0
+        self.cost = 0.0
+        self.by_call_site: dict[str, dict[str, float]] = defaultdict(lambda: {"calls": 0, "tokens": 0, "cost": 0.0})
+
+    def child(self, limits: dict[str, float] | None = None) -> "BudgetTracker":
+        """Create a tracker whose usage also counts against this one."""
+        return BudgetTracker(limits, parent=self, degrade_at=self.degrade_at)
+
+    def record_usage(self, call_site: str, prompt_tokens: int, completion_tokens: int, cost: float) -> None:
+        total = prompt_tokens + completion_tokens
+        self.tokens += total
+        self.cost += cost
+        site = self.by_call_site[call_site]
+        site["calls"] += 1
+        site["tokens"] += total
+        site["cost"] += cost
+        if self.parent:
+            self.parent.record_usage(call_site, prompt_tokens, completion_tokens, cost)
+
+    def record_step(self) -> None:
+        self.steps += 1
+        if self.parent:
+            self.parent.record_step()
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started_at
+
+    def usage_fraction(self) -> float:
+        """Return the largest used share of any limit, including the parent's."""
+        used = {"steps": self.steps, "tokens": self.tokens, "cost": self.cost, "time": self.elapsed}
+        fractions = [used[key] / limit for key, limit in self.limits.items() if limit > 0]
+        if self.parent:
+            fractions.append(self.parent.usage_fraction())
+        return max(fractions, default=0.0)
+
+    def should_degrade(self) -> bool:
+        return self.usage_fraction() >= self.degrade_at
+
+    def exhausted_reason(self) -> str | None:
+        """Describe the first exhausted limit, or return None if there is budget left."""
+        used = {"steps": self.steps, "tokens": self.tokens, "cost": self.cost, "time": self.elapsed}
+        for key, limit in self.limits.items():
+            if used[key] >= limit:
+                return f"{key} budget exhausted ({used[key]:.4g} of {limit:.4g})"
+        if self.parent:
+            reason = self.parent.exhausted_reason()
+            if reason:
+                return f"batch {reason}"
+        return None
+
+    def check(self) -> None:
+        """Raise BudgetExceededError if any limit has been reached."""
+        reason = self.exhausted_reason()
+        if reason:
+            raise BudgetExceededError(reason)
+
+    def report(self) -> str:
+        lines = [
+            f"Steps: {self.steps}, tokens: {self.tokens}, cost: ${self.cost:.4f}, time: {self.elapsed:.1f}s",
+        ]
+        lines.extend(
+            f"  {site}: {usage['calls']} call(s), {usage['tokens']} tokens, ${usage['cost']:.4f}"
+            for site, usage in sorted(self.by_call_site.items(), key=lambda item: -item[1]["cost"])
+        )
+        return "\n".join(lines)
@@ -5,6 +5,16 @@ from model_manager import ModelManager
 from utils import get_logger
 
 
+# Decisions that are a single keyword rather than an element number.
+KEYWORD_ACTIONS: dict[str, dict[str, object]] = {
+    "ENTER": {"type": "submit"},
+    "SCROLL": {"type": "scroll", "direction": "down"},
+    "SCROLL DOWN": {"type": "scroll", "direction": "down"},
+    "SCROLL UP": {"type": "scroll", "direction": "up"},
+    "NEXT PAGE": {"type": "next_page"},
+}
+
+
 class DecisionMaker:
     def __init__(self, model_manager: ModelManager, analyzer: BaseAnalyzer, verbose: bool) -> None:
         self.logger = get_logger()
@@ -12,18 +22,25 @@ class DecisionMaker:
         self.analyzer = analyzer
         self.verbose = verbose
 
+    def fork(self) -> "DecisionMaker":
+        """Return a decision maker with the same settings for a concurrent task, with its own model state."""
+        model_manager = self.model_manager.fork()
+        return DecisionMaker(model_manager, self.analyzer.fork(model_manager), self.verbose)
+
     async def make_decision(
         self,
         mapped_elements: dict[int, dict[str, object]],
         task: str,
         current_url: str,
         plugin_data: dict[str, Any],
+        progress_note: str | None = None,
     ) -> str | None:
         context = {
             "mapped_elements": mapped_elements,
             "task": task,
             "current_url": current_url,
             "plugin_data": plugin_data,
+            "progress_note": progress_note or "",
         }
         decision = await self.analyzer.analyze(context)
 
@@ -46,8 +63,8 @@ class DecisionMaker:
                 except ValueError:
                     self.logger.error(f"Invalid element number in input action: {action_str}")
             else:
-                if action_str.upper() == "ENTER":
-                    actions.append({"type": "submit"})
+                if command := KEYWORD_ACTIONS.get(action_str.upper()):
+                    actions.append(dict(command))
                 elif action_str.lower().startswith("click on"):
                     try:
                         element = int(action_str.split()[-1])
@@ -63,5 +80,11 @@ class DecisionMaker:
 
         return actions
 
+    def record_outcome(self, outcome: str) -> None:
+        self.analyzer.record_outcome(outcome)
+
+    def reset(self) -> None:
+        self.analyzer.reset()
+
     async def is_task_completed(self, task: str, current_url: str) -> bool:
         return await self.analyzer.is_task_completed(task, current_url)
@@ -0,0 +1,98 @@
+import asyncio
+import hashlib
+import re
+from collections import defaultdict
+from collections.abc import Iterable, Iterator, Mapping
+from typing import TYPE_CHECKING
+
+
+if TYPE_CHECKING:
+    from navigator import ElementInfo
+
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> list[str]:
+    """Split lower-cased text into alphanumeric tokens."""
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class ElementIndex(Mapping[int, "ElementInfo"]):
+    """
+    Read-only view of a page's mapped elements with lookups built once per map.
+
+    It behaves like the ``dict[int, ElementInfo]`` returned before, and adds a token
+    inverted index, per-type and per-DOM-id lookups, and precomputed normalized text
+    so analyzers and plugins can query elements without rescanning them.
+    """
+
+    def __init__(self, elements: "dict[int, ElementInfo]") -> None:
+        self._elements = elements
+        self.normalized: dict[int, str] = {}
+        self.prompt_lines: dict[int, str] = {}
+        self._tokens: defaultdict[str, set[int]] = defaultdict(set)
+        self._by_type: defaultdict[str, list[int]] = defaultdict(list)
+        self._by_dom_id: dict[str, int] = {}
+        for number, info in elements.items():
+            description = info["description"]
+            self.normalized[number] = " ".join(tokenize(description))
+            self.prompt_lines[number] = f"{description} ({info['type']})"
+            for token in tokenize(description):
+                self._tokens[token].add(number)
+            self._by_type[info["type"]].append(number)
+            if info.get("id"):
+                self._by_dom_id[info["id"]] = number
+        self.fingerprint = hashlib.sha1(
+            "\n".join(f"{number}:{line}" for number, line in self.prompt_lines.items()).encode(),
+            usedforsecurity=False,
+        ).hexdigest()
+
+    def __getitem__(self, number: int) -> "ElementInfo":
+        return self._elements[number]
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self._elements)
+
+    def __len__(self) -> int:
+        return len(self._elements)
+
+    def with_token(self, token: str) -> set[int]:
+        """Element numbers whose description contains the exact token."""
+        return set(self._tokens.get(token.lower(), ()))
+
+    def search(self, query: str) -> set[int]:
+        """Element numbers whose description contains every token of the query."""
+        tokens = tokenize(query)
+        if not tokens:
+            return set()
+        return set.intersection(*(self.with_token(token) for token in tokens))
+
+    def containing(self, substring: str) -> set[int]:
+        """Element numbers with a description token containing the substring (scans the vocabulary only)."""
+        substring = substring.lower()
+        return {number for token, numbers in self._tokens.items() if substring in token for number in numbers}
+
+    def contains_any(self, substrings: Iterable[str]) -> bool:
+        """Whether any element description contains any of the substrings, ignoring case and punctuation."""
+        phrases = {" ".join(tokenize(substring)) for substring in substrings} - {""}
+        # Single words only need the vocabulary; phrases like "credit card" span tokens.
+        words = {phrase for phrase in phrases if " " not in phrase}
+        if any(word in token for token in self._tokens for word in words):
+            return True
+        return any(phrase in text for text in self.normalized.values() for phrase in phrases - words)
+
+    def of_type(self, element_type: str) -> list[int]:
+        """Element numbers of a mapped type such as "input", "clickable" or "dropdown"."""
+        return list(self._by_type.get(element_type, ()))
+
+    def by_dom_id(self, dom_id: str) -> int | None:
+        """Element number of the element with the given DOM id."""
+        return self._by_dom_id.get(dom_id)
+
+    async def dispose(self) -> None:
+        """Release the browser-side handles of every element in this map."""
+        await asyncio.gather(
+            *(info["element"].dispose() for info in self._elements.values() if info["element"]),
+            return_exceptions=True,
+        )
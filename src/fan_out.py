@@ -0,0 +1,142 @@
+import asyncio
+from collections import defaultdict
+from typing import Any
+
+from budget import BudgetTracker
+from decision_maker import DecisionMaker
+from model_manager import ModelManager
+from navigator import Navigator
+from plugins.plugin_manager import PluginManager
+from task_runner import execute_task
+from utils import extract_domain, format_url, get_logger
+
+
+logger = get_logger()
+
+PLAN_PROMPT = (
+    "You split web tasks into independent sub-tasks that can run in parallel browser tabs. "
+    "If the task compares or collects information across several websites or items (for example prices "
+    "at different stores), respond with one self-contained sub-task per line, each naming its website. "
+    "If the task cannot be split, respond with only the word NONE."
+)
+
+EXTRACT_PROMPT = (
+    "You extract the information relevant to a web task from page text. "
+    "Respond with a short factual answer, or 'Not found' if the page does not contain it."
+)
+
+MERGE_PROMPT = (
+    "You combine the findings of parallel web sub-tasks into one final answer to the original task. "
+    "Compare the results where relevant and mention which sources had no answer."
+)
+
+
+async def plan_subtasks(model_manager: ModelManager, task: str, max_branches: int = 8) -> list[str]:
+    """Ask the model whether the task fans out, returning the sub-tasks or an empty list."""
+    response = await model_manager.get_completion(
+        [{"role": "system", "content": PLAN_PROMPT}, {"role": "user", "content": task}],
+        call_site="fan_out_plan",
+    )
+    if not response or response.strip().upper() == "NONE":
+        return []
+    subtasks = [line.strip(" -*\t") for line in response.splitlines() if line.strip(" -*\t")]
+    return subtasks[:max_branches] if len(subtasks) > 1 else []
+
+
+async def _extract_answer(model_manager: ModelManager, subtask: str, navigator: Navigator) -> str:
+    try:
+        page_text = await navigator.page.inner_text("body")
+    except Exception:
+        logger.exception("Failed to read page text for '%s'", subtask)
+        return "Not found"
+    answer = await model_manager.get_completion(
+        [
+            {"role": "system", "content": EXTRACT_PROMPT},
+            {
+                "role": "user",
+                "content": f"Task: {subtask}\nURL: {navigator.page.url}\n\nPage text:\n{page_text[:6000]}",
+            },
+        ],
+        call_site="fan_out_extract",
+    )
+    return answer or "Not found"
+
+
+class FanOut:
+    """Runs the sub-tasks of a comparison task in parallel tabs of the shared browser."""
+
+    def __init__(
+        self,
+        navigator: Navigator,
+        decision_maker: DecisionMaker,
+        plugin_manager: PluginManager,
+        *,
+        max_parallel: int = 4,
+        max_per_domain: int = 2,
+    ) -> None:
+        self.navigator = navigator
+        self.decision_maker = decision_maker
+        self.model_manager = decision_maker.model_manager
+        self.plugin_manager = plugin_manager
+        self.parallel_slots = asyncio.Semaphore(max_parallel)
+        self.domain_slots: defaultdict[str, asyncio.Semaphore] = defaultdict(lambda: asyncio.Semaphore(max_per_domain))
+
+    async def run(self, task: str, subtasks: list[str], budget: BudgetTracker | None = None) -> str | None:
+        """Run every sub-task concurrently and merge their findings into one answer."""
+        await self.navigator.ensure_browser()
+        logger.info("Fanning out into %s parallel sub-tasks", len(subtasks))
+        results = await asyncio.gather(*(self._run_branch(subtask, budget) for subtask in subtasks))
+        for result in results:
+            logger.info("[%s] %s", result["subtask"], result["answer"])
+
+        findings = "\n".join(f"- {r['subtask']} ({r['url'] or 'no page'}): {r['answer']}" for r in results)
+        self.model_manager.start_budget(budget)
+        answer = await self.model_manager.get_completion(
+            [
+                {"role": "system", "content": MERGE_PROMPT},
+                {"role": "user", "content": f"Original task: {task}\n\nFindings:\n{findings}"},
+            ],
+            call_site="fan_out_merge",
+        )
+        logger.info("Final answer:\n%s", answer or findings)
+        return answer or findings
+
+    async def _run_branch(self, subtask: str, budget: BudgetTracker | None) -> dict[str, Any]:
+        # Each branch decides on its own, with a fork of the main decision maker and model state.
+        decision_maker = self.decision_maker.fork()
+        model_manager = decision_maker.model_manager
+        branch_budget = budget.child() if budget else None
+        model_manager.start_budget(branch_budget)
+        url, parsed_task = await model_manager.parse_initial_message(subtask)
+        if not url or not parsed_task:
+            return {"subtask": subtask, "url": None, "answer": "Could not work out which site to use"}
+        url = format_url(url)
+
+        # Wait for the site first so queued branches do not hold global slots other sites could use.
+        async with self.domain_slots[extract_domain(url)], self.parallel_slots:
+            navigator = Navigator(
+                headless=self.navigator.headless,
+                detection_method=self.navigator.detection_method,
+                show_visuals=self.navigator.show_visuals,
+                window_margin=self.navigator.window_margin,
+                browser=self.navigator.browser,
+            )
+            try:
+                await execute_task(
+                    subtask,
+                    navigator,
+                    decision_maker,
+                    self.plugin_manager,
+                    budget=branch_budget,
+                    initial=(url, parsed_task),
+                )
+                if not navigator.page:
+                    return {"subtask": subtask, "url": url, "answer": "Not found"}
+                answer = await _extract_answer(model_manager, parsed_task, navigator)
+            except Exception as e:
+                logger.exception("Sub-task '%s' failed", subtask)
+                return {"subtask": subtask, "url": url, "answer": f"Failed: {e}"}
+            else:
+                return {"subtask": subtask, "url": navigator.page.url, "answer": answer}
+            finally:
+                await navigator.cleanup()
@@ -2,83 +2,25 @@ import argparse
 import asyncio
 
 from analyzers.text_analyzer import TextAnalyzer
+from budget import BudgetExceededError, BudgetTracker, parse_budget
 from decision_maker import DecisionMaker
+from fan_out import FanOut, plan_subtasks
 from model_manager import ModelManager
 from navigator import Navigator
 from plugins.plugin_manager import PluginManager
-from utils import format_url, get_logger, setup_logging
+from prefetcher import Prefetcher
+from service import AgentService
+from session_store import SessionStore
+from startup_profile import profiler
+from task_journal import TaskJournal
+from task_runner import execute_task
+from utils import get_logger, setup_logging
+from work_queue import WorkQueue, run_workers
 
 
-async def execute_task(
-    task: str,
-    navigator: Navigator,
-    decision_maker: DecisionMaker,
-    plugin_manager: PluginManager,
-) -> None:
-    logger = get_logger()
-    url, parsed_task = await decision_maker.analyzer.model_manager.parse_initial_message(task)
-    if not url or not parsed_task:
-        logger.error("Failed to parse initial message")
-        return
-
-    url = format_url(url)
-    logger.info("Navigating to: %s", url)
-    logger.info("Task: %s", parsed_task)
-
-    try:
-        mapped_elements, current_url = await navigator.navigate_to(url, plugin_manager)
-    except Exception as e:
-        logger.error(f"Failed to navigate to the URL: {e}")
-        return
-
-    while True:
-        await plugin_manager.handle_event("pre_decision", {"url": current_url, "elements": mapped_elements})
-        plugin_data = await plugin_manager.pre_decision({"url": current_url, "elements": mapped_elements})
-
-        decision = await decision_maker.make_decision(mapped_elements, parsed_task, current_url, plugin_data)
-
-        if not decision:
-            logger.error("Failed to get a decision from the AI")
-            break
-
-        actions = decision_maker.parse_decision(decision)
-        if not actions:
-            logger.info("Task completed or no further actions required")
-            break
-
-        await plugin_manager.handle_event(
-            "post_decision",
-            {"decision": decision, "url": current_url, "elements": mapped_elements},
-        )
-        await plugin_manager.post_decision(decision, {"url": current_url, "elements": mapped_elements})
-
-        all_actions_successful = True
-        for action in actions:
-            action_result = await navigator.perform_action(action, mapped_elements, plugin_manager)
-            if not action_result:
-                logger.error("Failed to perform action: %s", action)
-                all_actions_successful = False
-                break
-
-        if not all_actions_successful:
-            break
-
-        result = await navigator.navigate_to(navigator.page.url, plugin_manager)
-        if not result:
-            logger.error("Failed to update page elements after actions")
-            break
-
-        mapped_elements, current_url = result
-
-        if await decision_maker.is_task_completed(parsed_task, current_url):
-            logger.info("Task completed successfully")
-            break
-
-    logger.info("Task execution completed")
-
 def parse_arguments() -> argparse.Namespace:
     parser = argparse.ArgumentParser(description="Autonomous Web AI")
-    parser.add_argument("task", help="The task to perform")
+    parser.add_argument("tasks", nargs="*", metavar="task", help="The task(s) to perform, run one after another")
     parser.add_argument(
         "--method",
         choices=["xpath", "ocr"],
@@ -94,33 +36,247 @@ def parse_arguments() -> argparse.Namespace:
         default="openai",
         help="Choose the model provider (default: openai)",
     )
-    return parser.parse_args()
+    parser.add_argument(
+        "--persist-session",
+        action="store_true",
+        help="Save and restore cookies and localStorage per site between runs",
+    )
+    parser.add_argument(
+        "--session-profile",
+        help="Name of the stored session to use (default: the target site's domain)",
+    )
+    parser.add_argument(
+        "--conversational",
+        action="store_true",
+        help="Keep a compressed step history and send only element changes after the first step",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue an interrupted run of the same task from its last completed step",
+    )
+    parser.add_argument(
+        "--budget",
+        type=parse_budget,
+        default={},
+        help="Per-task limits, e.g. steps=30,tokens=200000,cost=1.5,time=600",
+    )
+    parser.add_argument(
+        "--batch-budget",
+        type=parse_budget,
+        default={},
+        help="Limits across all tasks of this run, same format as --budget",
+    )
+    parser.add_argument(
+        "--profile-startup",
+        action="store_true",
+        help="Report import times and startup milestones such as time to first navigation",
+    )
+    parser.add_argument(
+        "--window-margin",
+        type=int,
+        metavar="PX",
+        help="Only map elements within PX pixels of the visible screen; the AI scrolls to see more",
+    )
+    parser.add_argument(
+        "--prefetch",
+        type=int,
+        default=0,
+        metavar="N",
+        help="Load the N most likely next pages in the background while the AI decides (default: 0, off)",
+    )
+    parser.add_argument(
+        "--prefetch-map",
+        action="store_true",
+        help="Also map the elements of prefetched pages ahead of time",
+    )
+    parser.add_argument(
+        "--fan-out",
+        action="store_true",
+        help="Split comparison tasks into sub-tasks that run in parallel tabs",
+    )
+    parser.add_argument("--max-tabs", type=int, default=4, help="Maximum parallel tabs for --fan-out (default: 4)")
+    parser.add_argument(
+        "--max-per-domain",
+        type=int,
+        default=2,
+        help="Maximum parallel tabs on the same site for --fan-out (default: 2)",
+    )
+    parser.add_argument(
+        "--serve",
+        action="store_true",
+        help="Run as a long-lived service that accepts tasks over HTTP",
+    )
+    parser.add_argument("--host", default="127.0.0.1", help="Address for --serve to listen on (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8765, help="Port for --serve to listen on (default: 8765)")
+    parser.add_argument("--socket", help="Listen on this Unix socket path instead of a TCP port")
+    parser.add_argument(
+        "--max-concurrent",
+        type=int,
+        default=4,
+        help="Maximum number of tasks the service runs at once (default: 4)",
+    )
+    parser.add_argument(
+        "--queue",
+        default=".webtalk/queue.db",
+        metavar="PATH",
+        help="SQLite task queue used by --enqueue and --workers (default: .webtalk/queue.db)",
+    )
+    parser.add_argument("--enqueue", action="store_true", help="Add the tasks to the queue and exit")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=0,
+        metavar="N",
+        help="Run queued tasks (plus any given ones) in N worker processes, each with its own browser",
+    )
+    args = parser.parse_args()
+    if not args.tasks and not args.serve and not args.workers:
+        parser.error("at least one task is required unless --serve or --workers is given")
+    return args
+
+
+async def run_service(args: argparse.Namespace, model_manager: ModelManager) -> None:
+    service = AgentService(
+        Navigator(
+            headless=True,
+            detection_method=args.method,
+            session_store=SessionStore() if args.persist_session else None,
+        ),
+        DecisionMaker(model_manager, TextAnalyzer(model_manager, conversational=args.conversational), args.verbose),
+        PluginManager("src/plugins", "config/plugins.json"),
+        max_concurrent=args.max_concurrent,
+    )
+    try:
+        await service.start()
+        await service.serve(args.host, args.port, args.socket)
+    finally:
+        await service.stop()
+
+
+async def run_queue(args: argparse.Namespace) -> None:
+    logger = get_logger()
+    queue = WorkQueue(args.queue)
+    for task in args.tasks:
+        queue.enqueue(task, args.budget)
+    if args.tasks:
+        logger.info("Queued %s task(s) in %s", len(args.tasks), args.queue)
+    if not args.workers:
+        return
+    if args.persist_session:
+        # Workers must all encrypt with the same key, so create it before they are spawned.
+        SessionStore.ensure_key()
+
+    options = {
+        "model": args.model,
+        "method": args.method,
+        "conversational": args.conversational,
+        "persist_session": args.persist_session,
+        "verbose": args.verbose,
+        "quiet": args.quiet,
+    }
+    await run_workers(queue, args.workers, options)
+    for row in queue.results():
+        logger.info(
+            "Task %s [%s, %s attempt(s)]: %s -> %s",
+            row["id"],
+            row["status"],
+            row["attempts"],
+            row["task"],
+            row["result"] or row["error"],
+        )
+
+
+async def run_tasks(
+    args: argparse.Namespace,
+    navigator: Navigator,
+    decision_maker: DecisionMaker,
+    plugin_manager: PluginManager,
+) -> None:
+    """Run the given tasks one after another within the batch budget, fanning out where possible."""
+    logger = get_logger()
+    model_manager = decision_maker.model_manager
+    batch_budget = BudgetTracker(args.batch_budget)
+    for task in args.tasks:
+        try:
+            batch_budget.check()
+        except BudgetExceededError as e:
+            logger.warning("Skipping remaining tasks: %s", e)
+            break
+        task_budget = batch_budget.child(args.budget)
+        if args.fan_out:
+            model_manager.start_budget(task_budget)
+            subtasks = await plan_subtasks(model_manager, task, max_branches=args.max_tabs * 2)
+            if subtasks:
+                fan_out = FanOut(
+                    navigator,
+                    decision_maker,
+                    plugin_manager,
+                    max_parallel=args.max_tabs,
+                    max_per_domain=args.max_per_domain,
+                )
+                await fan_out.run(task, subtasks, budget=task_budget)
+                continue
+        await execute_task(
+            task,
+            navigator,
+            decision_maker,
+            plugin_manager,
+            journal=TaskJournal(task),
+            resume=args.resume,
+            budget=task_budget,
+        )
+
+    if len(args.tasks) > 1:
+        logger.info("Batch spend:\n%s", batch_budget.report())
 
 
 async def main() -> None:
     args = parse_arguments()
     setup_logging(args.verbose, args.quiet)
     logger = get_logger()
+    profiler.enabled = args.profile_startup
+    profiler.mark("arguments_parsed")
 
     try:
         model_manager = ModelManager.initialize(model_provider=args.model)
 
-        # Choose the appropriate analyzer based on args or config
-        analyzer = TextAnalyzer(model_manager)
-        # analyzer = VisionAnalyzer(model_manager)
+        if args.serve:
+            await run_service(args, model_manager)
+            return
+        if args.enqueue or args.workers:
+            await run_queue(args)
+            return
 
+        # Launch the browser first so it starts up while everything else is prepared.
         navigator = Navigator(
             headless=False,  # You might want to make this configurable
             detection_method=args.method,
             show_visuals=args.show_visuals,
+            session_store=SessionStore() if args.persist_session else None,
+            session_profile=args.session_profile,
+            window_margin=args.window_margin,
+            prefetcher=Prefetcher(args.prefetch, premap=args.prefetch_map) if args.prefetch else None,
         )
-        decision_maker = DecisionMaker(model_manager, analyzer, args.verbose)
+        navigator.start()
+        model_warm_up = asyncio.create_task(asyncio.to_thread(model_manager.warm_up))
 
-        plugin_manager = PluginManager("src/plugins", "config/plugins.json")
-        await plugin_manager.load_plugins()
+        # Choose the appropriate analyzer based on args or config
+        analyzer = TextAnalyzer(
+            model_manager,
+            conversational=args.conversational,
+            scrolling=args.window_margin is not None,
+        )
+        # analyzer = VisionAnalyzer(model_manager)
+        decision_maker = DecisionMaker(model_manager, analyzer, args.verbose)
 
         async with navigator:
-            await execute_task(args.task, navigator, decision_maker, plugin_manager)
+            plugin_manager = PluginManager("src/plugins", "config/plugins.json")
+            await plugin_manager.load_plugins()
+            await run_tasks(args, navigator, decision_maker, plugin_manager)
+            # Tasks with an explicit site start navigating before the model client is ready;
+            # awaiting here still surfaces a failed warm-up.
+            await model_warm_up
 
     except KeyboardInterrupt:
         logger.info("Received keyboard interrupt. Exiting.")
@@ -129,6 +285,8 @@ async def main() -> None:
     finally:
         if "plugin_manager" in locals():
             await plugin_manager.cleanup_plugins()
+        if profiler.enabled:
+            logger.info(profiler.report())
 
 
 if __name__ == "__main__":
@@ -0,0 +1,98 @@
+import re
+
+from utils import extract_domain, format_url
+
+
+KNOWN_SITES = {
+    "amazon": "amazon.com",
+    "google": "google.com",
+    "youtube": "youtube.com",
+    "wikipedia": "wikipedia.org",
+    "github": "github.com",
+    "reddit": "reddit.com",
+    "ebay": "ebay.com",
+    "linkedin": "linkedin.com",
+    "facebook": "facebook.com",
+    "instagram": "instagram.com",
+    "netflix": "netflix.com",
+    "spotify": "spotify.com",
+    "imdb": "imdb.com",
+    "etsy": "etsy.com",
+    "walmart": "walmart.com",
+    "best buy": "bestbuy.com",
+    "airbnb": "airbnb.com",
+    "duckduckgo": "duckduckgo.com",
+    "bing": "bing.com",
+    "stack overflow": "stackoverflow.com",
+    "stackoverflow": "stackoverflow.com",
+    "hacker news": "news.ycombinator.com",
+}
+
+TLDS = "com|org|net|io|dev|ai|co|app|edu|gov|info|me|tv|us|uk|de|fr|es|it|nl|ca|au|in|jp|ch|se|no|be|at|pl|eu"
+URL_PATTERN = re.compile(r"https?://[^\s<>\"']+", re.IGNORECASE)
+DOMAIN_PATTERN = re.compile(
+    rf"(?<![@\w.-])(?:www\.)?(?:[a-z0-9](?:[a-z0-9-]*[a-z0-9])?\.)+(?:{TLDS})(?![\w-])(?:/[^\s<>\"']*)?",
+    re.IGNORECASE,
+)
+# A site name only counts as the target when it follows a cue like "go to" or "on"; the cue group is optional
+# so that every mention is still seen when checking for conflicting sites. Names inside an e-mail address or
+# host name ("support@ebay.com") are not mentions.
+ALIAS_PATTERN = re.compile(
+    r"(?:\b(go\s+to|navigate\s+to|head\s+to|browse\s+to|visit|open|on|at)\s+(?:the\s+)?)?(?<![@.])\b("
+    + "|".join(re.escape(alias) for alias in sorted(KNOWN_SITES, key=len, reverse=True))
+    + r")\b",
+    re.IGNORECASE,
+)
+TRAILING_PUNCTUATION = ".,;:!?)]}'\""
+NAVIGATION_PREFIX = (
+    r"^(?:please\s+)?(?:go\s+to|navigate\s+to|head\s+to|browse\s+to|visit|open)\s+(?:the\s+)?{site}(?![\w-])"
+    r"(?:'s)?(?:\s+(?:web\s*site|home\s*page|front\s+page|main\s+page|site|page)\b)?"
+)
+NAVIGATION_JOINER = re.compile(r"^[\s,;.]*(?:(?:and\s+)?then\b|and\b)?[\s,]*", re.IGNORECASE)
+
+
+def _strip_navigation(message: str, site: str) -> str:
+    """Drop a leading "go to <site> and" clause; the remaining instruction is the task."""
+    prefix = re.compile(NAVIGATION_PREFIX.format(site=re.escape(site)), re.IGNORECASE)
+    match = prefix.match(message)
+    if not match:
+        return message
+    task = NAVIGATION_JOINER.sub("", message[match.end() :], count=1).strip()
+    return task[:1].upper() + task[1:] if task else message
+
+
+def _same_site(site: str, known: str) -> bool:
+    host = extract_domain(format_url(site)).lower()
+    return host == known or host.endswith(f".{known}")
+
+
+def parse_message_locally(message: str) -> tuple[str, str] | None:
+    """
+    Split a task message into ``(url, task)`` without the model.
+
+    Handles messages naming exactly one site, either as a URL, a bare domain like "amazon.com"
+    or a well-known site name after a cue such as "go to" or "on". Returns None when there is
+    no site, more than one, or a site name that disagrees with the domain, so the caller can
+    fall back to the model.
+    """
+    message = message.strip()
+    urls = [url.rstrip(TRAILING_PUNCTUATION) for url in URL_PATTERN.findall(message)]
+    remainder = URL_PATTERN.sub(" ", message)
+    domains = [domain.rstrip(TRAILING_PUNCTUATION) for domain in DOMAIN_PATTERN.findall(remainder)]
+
+    explicit = list(dict.fromkeys(urls + domains))
+    mentions = ALIAS_PATTERN.findall(message)
+    named = {KNOWN_SITES[alias.lower()] for _, alias in mentions}
+    if len(explicit) > 1 or len(named) > 1:
+        return None
+    if explicit:
+        site = explicit[0]
+        # "Go to stackoverflow and search ASP.NET" names a site and a domain that is not it.
+        if named and not _same_site(site, named.pop()):
+            return None
+        return site, _strip_navigation(message, site)
+
+    cued = [alias for cue, alias in mentions if cue]
+    if not cued:
+        return None
+    return named.pop(), _strip_navigation(message, cued[0])
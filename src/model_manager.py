@@ -1,25 +1,61 @@
+import asyncio
+import copy
 import os
+import threading
 from collections.abc import Mapping, Sequence
+from types import ModuleType
 
-import litellm
 from dotenv import load_dotenv
 
+from budget import BudgetTracker, estimate_cost
+from message_parser import parse_message_locally
+from startup_profile import lazy_import, profiler
 from utils import get_logger
 
 
-# Disable debugging long messages
-litellm._logging._disable_debugging()
+FALLBACK_MODELS = {
+    "gpt-4o": "gpt-4o-mini",
+    "groq/llama3-70b-8192": "groq/llama3-8b-8192",
+}
+ESCALATION_MODELS = {cheaper: stronger for stronger, cheaper in FALLBACK_MODELS.items()}
 
 
 class ModelManager:
-    def __init__(self, api_key: str, model: str) -> None:
+    def __init__(self, api_key: str, model: str, budget: BudgetTracker | None = None) -> None:
         self.logger = get_logger()
         self.api_key = api_key
         self.model = model
-        litellm.api_key = self.api_key
+        self.primary_model = model
+        self.escalated = False
+        self.budget = budget
+        self._litellm: ModuleType | None = None
+        self._litellm_lock = threading.Lock()
 
-        # Set up Langfuse
-        self.setup_langfuse()
+    @property
+    def litellm(self) -> ModuleType:
+        """Import and configure litellm on first use; importing it takes seconds."""
+        with self._litellm_lock:
+            if self._litellm is None:
+                litellm = lazy_import("litellm")
+                # Disable debugging long messages
+                litellm._logging._disable_debugging()
+                litellm.api_key = self.api_key
+                self._litellm = litellm
+
+                # Set up Langfuse
+                self.setup_langfuse()
+                profiler.mark("model_client_ready")
+        return self._litellm
+
+    def warm_up(self) -> None:
+        """Load the model client ahead of the first call (safe to run in a worker thread)."""
+        _ = self.litellm
+
+    async def _client(self) -> ModuleType:
+        """Return litellm, importing it off the event loop so the browser keeps starting meanwhile."""
+        if self._litellm is None:
+            await asyncio.to_thread(self.warm_up)
+        return self._litellm
 
     @classmethod
     def initialize(cls, model_provider: str = "openai") -> "ModelManager":
@@ -38,23 +74,91 @@ class ModelManager:
             os.environ["LANGFUSE_SECRET_KEY"] = langfuse_secret_key
             os.environ["LANGFUSE_HOST"] = langfuse_host
 
-            litellm.success_callback = ["langfuse"]
-            litellm.failure_callback = ["langfuse"]
+            self._litellm.success_callback = ["langfuse"]
+            self._litellm.failure_callback = ["langfuse"]
             self.logger.info("Langfuse integration enabled")
         else:
             self.logger.warning(
                 "Langfuse integration not enabled. Set LANGFUSE_PUBLIC_KEY and LANGFUSE_SECRET_KEY in .env to enable.",
             )
 
-    async def get_completion(self, messages: Sequence[dict], **kwargs: Mapping) -> str | None:
+    def fork(self) -> "ModelManager":
+        """Return a manager sharing this one's loaded client but with its own model and budget state."""
+        clone = copy.copy(self)
+        clone.model = self.primary_model
+        clone.escalated = False
+        clone.budget = None
+        return clone
+
+    def escalate(self) -> bool:
+        """Switch to a stronger model if there is one; return whether the model changed."""
+        stronger = ESCALATION_MODELS.get(self.model)
+        if not stronger:
+            return False
+        self.logger.warning("Escalating from %s to %s", self.model, stronger)
+        self.model = stronger
+        self.escalated = True
+        return True
+
+    @property
+    def degraded(self) -> bool:
+        """Whether the task budget is nearly spent and prompts should be trimmed."""
+        return bool(self.budget and self.budget.should_degrade())
+
+    def start_budget(self, budget: BudgetTracker | None) -> None:
+        """Account subsequent calls against a new budget and restore the primary model."""
+        self.budget = budget
+        self.model = self.primary_model
+        self.escalated = False
+
+    async def get_completion(
+        self,
+        messages: Sequence[dict],
+        call_site: str = "completion",
+        **kwargs: Mapping,
+    ) -> str | None:
+        if self.budget:
+            reason = self.budget.exhausted_reason()
+            if reason:
+                self.logger.warning("Skipping %s call: %s", call_site, reason)
+                return None
+            fallback = FALLBACK_MODELS.get(self.model)
+            # An escalated model was chosen because the cheap one was stuck; do not fall back to it again.
+            if fallback and not self.escalated and self.budget.should_degrade():
+                self.logger.warning("Budget nearly spent. Switching from %s to %s", self.model, fallback)
+                self.model = fallback
+
         try:
+            litellm = await self._client()
             response = await litellm.acompletion(model=self.model, messages=messages, **kwargs)
+            self._record_usage(call_site, response)
             return response.choices[0].message.content.strip()
         except Exception as e:
             self.logger.exception(f"Error getting completion from litellm: {e}")
             return None
 
+    def _record_usage(self, call_site: str, response: object) -> None:
+        if not self.budget:
+            return
+        usage = getattr(response, "usage", None)
+        prompt_tokens = getattr(usage, "prompt_tokens", 0) or 0
+        completion_tokens = getattr(usage, "completion_tokens", 0) or 0
+        cost = None
+        # litellm can only price models in its cost map; the rest use the built-in estimate.
+        if self.model in self.litellm.model_cost:
+            try:
+                cost = self.litellm.completion_cost(completion_response=response)
+            except Exception:
+                self.logger.exception("Failed to price the %s call; estimating its cost instead", call_site)
+        if cost is None:
+            cost = estimate_cost(self.model, prompt_tokens, completion_tokens)
+        self.budget.record_usage(call_site, prompt_tokens, completion_tokens, cost)
+
     async def parse_initial_message(self, message: str) -> tuple[str | None, str | None]:
+        if parsed := parse_message_locally(message):
+            self.logger.debug("Parsed initial message without the model: %s", parsed)
+            profiler.mark("initial_message_parsed")
+            return parsed
         try:
             response = await self.get_completion(
                 [
@@ -67,6 +171,7 @@ class ModelManager:
                     },
                     {"role": "user", "content": message},
                 ],
+                call_site="parse_initial_message",
                 metadata={
                     "generation_name": "parse_initial_message",
                     "trace_id": "initial_parse",
@@ -74,6 +179,7 @@ class ModelManager:
                 },
             )
             url, task = response.strip().split("\n")
+            profiler.mark("initial_message_parsed")
             return url.strip(), task.strip()
         except Exception as e:
             self.logger.exception(f"Error parsing initial message: {e}")
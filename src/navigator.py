@@ -1,10 +1,19 @@
 import asyncio
-from typing import Any, NotRequired, TypedDict
-
-from playwright.async_api import Browser, BrowserContext, ElementHandle, Page, async_playwright
+import re
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, NotRequired, TypedDict
 
+from element_index import ElementIndex
 from plugins.plugin_manager import PluginManager
-from utils import get_logger
+from session_store import SessionStore
+from startup_profile import lazy_import, profiler
+from utils import extract_domain, get_logger
+
+
+if TYPE_CHECKING:
+    from playwright.async_api import Browser, BrowserContext, ElementHandle, Page
+
+    from prefetcher import Prefetcher
 
 
 class NavigatorException(Exception):
@@ -15,17 +24,87 @@ class ElementNotFoundException(NavigatorException):
     """Raised when an element is not found on the page."""
 
 
-class ElementInfo(TypedDict):
-    element: ElementHandle
+@dataclass(slots=True, eq=False)
+class ElementInfo:
+    """Compact record for one mapped element; supports the dict-style reads callers already use."""
+
+    element: "ElementHandle"
     bbox: dict[str, float]
     type: str
     description: str
+    href: str | None = None
+    id: str | None = None
+    # The raw HTML input type (e.g. "password"), which `type` collapses into "input".
+    input_type: str | None = None
+
+    def __getitem__(self, key: str) -> "ElementHandle | dict[str, float] | str | None":
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key: str, default: str | None = None) -> "ElementHandle | dict[str, float] | str | None":
+        return getattr(self, key) if key in self.__slots__ else default
 
 
 class ActionDict(TypedDict):
     type: str
     element: NotRequired[int]
     text: NotRequired[str]
+    direction: NotRequired[str]
+
+
+INTERACTIVE_SELECTOR = 'a, button, [role="button"], input, textarea, select'
+# Collects everything needed about the matched elements in a single round trip.
+ELEMENT_INFO_SCRIPT = r"""(elements) => {
+    const labels = {};
+    for (const label of document.querySelectorAll('label')) {
+        const key = label.getAttribute('for') || label.id;
+        if (key) labels[key] = label.innerText;
+    }
+    return elements.map(el => {
+        const rect = el.getBoundingClientRect();
+        const tag = el.tagName.toLowerCase();
+        const id = el.getAttribute('id');
+        return {
+            visible: rect.width > 0 && rect.height > 0 && window.getComputedStyle(el).visibility !== 'hidden',
+            bbox: {x: rect.x, y: rect.y, width: rect.width, height: rect.height},
+            tag: tag,
+            type: el.type ?? null,
+            id: id,
+            description: (id && labels[id]) || el.innerText || el.getAttribute('aria-label')
+                || el.getAttribute('placeholder') || 'No description',
+            is_dropdown: tag === 'select',
+            // nofollow links get no target, so they are never fetched speculatively.
+            href: (el.href && !/\bnofollow\b/i.test(el.rel || '')) ? el.href : null,
+        };
+    });
+}"""
+# Fills several fields in one round trip, firing the events frameworks listen for, and reads the values back.
+BULK_FILL_SCRIPT = """(items) => items.map(([el, text]) => {
+    try {
+        const tag = el.tagName.toLowerCase();
+        const editable = el.getAttribute('contenteditable') === 'true';
+        if (!(tag === 'input' || tag === 'textarea' || editable)) return {ok: false, reason: 'not an input'};
+        if (el.disabled || el.readOnly) return {ok: false, reason: 'disabled or read-only'};
+        el.focus();
+        if (editable) {
+            el.textContent = text;
+        } else {
+            const proto = tag === 'textarea' ? HTMLTextAreaElement.prototype : HTMLInputElement.prototype;
+            Object.getOwnPropertyDescriptor(proto, 'value').set.call(el, text);
+        }
+        el.dispatchEvent(new Event('input', {bubbles: true}));
+        el.dispatchEvent(new Event('change', {bubbles: true}));
+        const value = editable ? el.textContent : el.value;
+        return {ok: value === text, reason: value === text ? null : 'value did not stick'};
+    } catch (e) {
+        return {ok: false, reason: String(e)};
+    }
+})"""
+NEXT_PAGE_PATTERN = re.compile(
+    r"^\s*(next|next page|more results|load more|show more|\u203a|\u00bb|>)\s*$",
+    re.IGNORECASE,
+)
 
 
 class Navigator:
@@ -38,6 +117,12 @@ class Navigator:
         page_load_timeout: int = 60000,
         detection_method: str = "xpath",
         show_visuals: bool = False,
+        session_store: SessionStore | None = None,
+        session_profile: str | None = None,
+        browser: "Browser | None" = None,
+        prefetcher: "Prefetcher | None" = None,
+        window_margin: int | None = None,
+        max_window_elements: int = 150,
     ) -> None:
         self.logger = get_logger()
         self.headless = headless
@@ -47,46 +132,136 @@ class Navigator:
         self.page_load_timeout = page_load_timeout
         self.detection_method = detection_method
         self.show_visuals = show_visuals
+        self.session_store = session_store
+        self.session_profile = session_profile
+        self._configured_profile = session_profile
+        self._session_restored = False
         self.playwright_instance = None
-        self.browser: Browser | None = None
+        self._setup_task: asyncio.Task | None = None
+        # A browser passed in is shared with other navigators; we then only own our context.
+        self.browser: Browser | None = browser
+        self._owns_browser = browser is None
         self.context: BrowserContext | None = None
         self.page: Page | None = None
+        # When set, only elements within this many pixels of the viewport are mapped.
+        self.window_margin = window_margin
+        self.max_window_elements = max_window_elements
+        self.prefetcher = prefetcher
+        if prefetcher:
+            prefetcher.navigator = self
+        # The current page's element map; its handles are disposed once a newer map replaces it.
+        self._live_elements: ElementIndex | None = None
+        # Set when a prefetched page is swapped in, so navigate_to does not load it again.
+        self._adopted_url: str | None = None
+        self._adopted_elements: ElementIndex | None = None
 
     async def __aenter__(self):
         if not self.page:
-            await self.setup_browser()
+            self.start()
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         await self.cleanup()
 
+    def start(self) -> None:
+        """Begin launching the browser in the background so other startup work can overlap with it."""
+        if not self._setup_task:
+            self._setup_task = asyncio.create_task(self.setup_browser())
+
+    async def ensure_browser(self) -> None:
+        """Wait for the browser launched by start(), starting it if needed."""
+        self.start()
+        await self._setup_task
+
     async def setup_browser(self) -> None:
         """Initialize the browser, context, and page."""
-        if not self.playwright_instance:
-            self.playwright_instance = await async_playwright().start()
+        if not self._owns_browser:
+            if not self.context:
+                await self._new_context()
+        elif not self.playwright_instance:
+            async_api = await asyncio.to_thread(lazy_import, "playwright.async_api")
+            self.playwright_instance = await async_api.async_playwright().start()
             self.browser = await self.playwright_instance.chromium.launch(headless=self.headless)
-            self.context = await self.browser.new_context(
-                user_agent=self.user_agent,
-                viewport=self.viewport,
-            )
-            self.page = await self.context.new_page()
+            await self._new_context()
+            profiler.mark("browser_ready")
+
+    async def _new_context(self, storage_state: dict[str, Any] | None = None) -> None:
+        """Create a fresh browser context and page, optionally seeded with storage state."""
+        if self.context:
+            await self.context.close()
+        self.context = await self.browser.new_context(
+            user_agent=self.user_agent,
+            viewport=self.viewport,
+            storage_state=storage_state,
+        )
+        self.page = await self.context.new_page()
+
+    async def _restore_session(self, url: str) -> None:
+        """Load the stored session for the site profile before the first navigation."""
+        if not self.session_store or self._session_restored:
+            return
+        self._session_restored = True
+        self.session_profile = self.session_profile or extract_domain(url)
+        try:
+            state = self.session_store.load(self.session_profile)
+        except Exception:
+            self.logger.exception("Failed to restore session for %s", self.session_profile)
+            return
+        if state:
+            await self._new_context(state)
+
+    async def save_session(self) -> None:
+        """Persist the current storage state for the site profile."""
+        if not self.session_store or not self.session_profile or not self.context:
+            return
+        try:
+            state = await self.context.storage_state()
+            self.session_store.save(self.session_profile, state)
+        except Exception:
+            self.logger.exception("Failed to save session for %s", self.session_profile)
+
+    async def recycle(self) -> None:
+        """Save the session and start over with a clean context, keeping the browser warm."""
+        await self.ensure_browser()
+        await self.save_session()
+        self.session_profile = self._configured_profile
+        self._session_restored = False
+        await self._new_context()
 
     async def cleanup(self) -> None:
         """Clean up browser resources."""
+        if self._setup_task and not self._setup_task.done():
+            await asyncio.gather(self._setup_task, return_exceptions=True)
+        await self.save_session()
+        if not self._owns_browser:
+            if self.context:
+                await self.context.close()
+                self.context = None
+                self.page = None
+            return
         if self.browser:
             self.logger.info("Closing browser.")
             await self.browser.close()
         if self.playwright_instance:
             await self.playwright_instance.stop()
 
-    async def navigate_to(self, url: str, plugin_manager: PluginManager) -> tuple[dict[int, ElementInfo], str]:
+    async def navigate_to(self, url: str, plugin_manager: PluginManager) -> tuple[ElementIndex, str]:
         """Navigate to a URL and return mapped elements and current URL."""
         if not self.page:
-            await self.setup_browser()  # Ensure the browser is set up
+            await self.ensure_browser()  # Ensure the browser is set up
             if not self.page:
                 msg = "Failed to initialize page"
                 raise NavigatorException(msg)
 
+        await self._restore_session(url)
+
+        if url == self._adopted_url:
+            mapped_elements = self._adopted_elements or await self._map_elements(await self._detect_elements())
+            self._adopted_url, self._adopted_elements = None, None
+            await self._set_live_elements(mapped_elements)
+            await plugin_manager.handle_event("navigation", {"url": self.page.url, "elements": mapped_elements})
+            return mapped_elements, self.page.url
+
         for attempt in range(1, self.max_retries + 1):
             try:
                 self.logger.info("Attempt %s/%s: Navigating to %s", attempt, self.max_retries, url)
@@ -100,9 +275,11 @@ class Navigator:
                     self.logger.warning("Received HTTP status %s. Retrying...", response.status)
                     continue
 
+                if "first_navigation" not in profiler.milestones:
+                    self.logger.info("Time to first navigation: %.2fs", profiler.mark("first_navigation"))
                 self.logger.info("Page loaded successfully. Mapping elements...")
                 elements = await self._detect_elements()
-                mapped_elements = await self._map_elements(elements)
+                mapped_elements = await self._set_live_elements(await self._map_elements(elements))
 
                 await plugin_manager.handle_event("navigation", {"url": self.page.url, "elements": mapped_elements})
                 return mapped_elements, self.page.url
@@ -113,80 +290,104 @@ class Navigator:
         msg = f"Failed to navigate to {url} after {self.max_retries} attempts."
         raise NavigatorException(msg)
 
-    async def _detect_elements(self) -> list[dict[str, Any]]:
-        """Detect elements on the page using the configured method."""
+    async def _detect_elements(self, page: "Page | None" = None) -> list[dict[str, Any]]:
+        """Detect elements on the page (the current one by default) using the configured method."""
         if self.detection_method == "ocr":
             return await self._detect_elements_ocr()
-        return await self._detect_elements_xpath()
+        return await self._detect_elements_xpath(page or self.page)
 
-    async def _detect_elements_xpath(self) -> list[dict[str, Any]]:
+    async def _detect_elements_xpath(self, page: "Page | None") -> list[dict[str, Any]]:
         """Detect elements using XPath."""
-        if not self.page:
+        if not page:
             msg = "Page is not initialized"
             raise NavigatorException(msg)
 
-        labels, inputs = await asyncio.gather(
-            self.page.query_selector_all("label"),
-            self.page.query_selector_all("input, select, textarea, button, a"),
-        )
+        if self.window_margin is None:
+            handles = await page.query_selector_all(INTERACTIVE_SELECTOR)
+        else:
+            handles = await self._query_window(page)
 
-        label_map = await self._create_label_map(labels)
-        elements = await self.page.query_selector_all('a, button, [role="button"], input, textarea, select')
+        infos = await page.evaluate(ELEMENT_INFO_SCRIPT, handles) if handles else []
+        elements, hidden = [], []
+        for handle, info in zip(handles, infos, strict=True):
+            if info["visible"]:
+                elements.append({**info, "element": handle})
+            else:
+                hidden.append(handle)
+        await self._dispose_handles(hidden)
+        return elements
+
+    @staticmethod
+    async def _dispose_handles(handles: list["ElementHandle"]) -> None:
+        """Release element handles we will not act on, so the page can free them."""
+        await asyncio.gather(*(handle.dispose() for handle in handles), return_exceptions=True)
+
+    async def _set_live_elements(self, mapped_elements: ElementIndex) -> ElementIndex:
+        """Make a map current and release the handles of the one it supersedes."""
+        previous, self._live_elements = self._live_elements, mapped_elements
+        if previous is not None and previous is not mapped_elements:
+            await previous.dispose()
+        return mapped_elements
+
+    async def _query_window(self, page: "Page") -> list["ElementHandle"]:
+        """Select only the interactive elements within the viewport plus the margin."""
+        await page.evaluate(
+            """([selector, margin, limit]) => {
+                document.querySelectorAll('[data-webtalk-window]').forEach(el => el.removeAttribute('data-webtalk-window'));
+                let count = 0;
+                for (const el of document.querySelectorAll(selector)) {
+                    const rect = el.getBoundingClientRect();
+                    if (rect.width > 0 && rect.height > 0 && rect.bottom >= -margin && rect.top <= window.innerHeight + margin) {
+                        el.setAttribute('data-webtalk-window', '');
+                        if (++count >= limit) break;
+                    }
+                }
+            }""",
+            [INTERACTIVE_SELECTOR, self.window_margin, self.max_window_elements],
+        )
+        return await page.query_selector_all("[data-webtalk-window]")
 
-        return [await self._create_element_info(elem, label_map) for elem in elements if await elem.is_visible()]
+    async def refresh_elements(self, plugin_manager: PluginManager) -> tuple[ElementIndex, str]:
+        """Re-map the current page in place, e.g. after scrolling, without loading it again."""
+        await self.page.wait_for_load_state("domcontentloaded")
+        mapped_elements = await self._set_live_elements(await self._map_elements(await self._detect_elements()))
+        await plugin_manager.handle_event("navigation", {"url": self.page.url, "elements": mapped_elements})
+        return mapped_elements, self.page.url
 
-    async def _create_label_map(self, labels: list[ElementHandle]) -> dict[str, str]:
-        """Create a mapping of element IDs to their labels."""
-        label_map = {}
-        for label in labels:
-            for_attr, text = await asyncio.gather(label.get_attribute("for"), label.inner_text())
-            if for_attr:
-                label_map[for_attr] = text
-            else:
-                label_id = await label.evaluate("el => el.id")
-                if label_id:
-                    label_map[label_id] = text
-        return label_map
-
-    async def _create_element_info(self, elem: ElementHandle, label_map: dict[str, str]) -> dict[str, Any]:
-        """Create a dictionary of element information."""
-        elem_id = await elem.get_attribute("id")
-        return {
-            "element": elem,
-            "bbox": await elem.bounding_box(),
-            "tag": await elem.evaluate("el => el.tagName.toLowerCase()"),
-            "type": await elem.evaluate("el => el.type"),
-            "placeholder": await elem.get_attribute("placeholder"),
-            "aria_label": await elem.get_attribute("aria-label"),
-            "inner_text": await elem.inner_text(),
-            "id": elem_id,
-            "description": label_map.get(elem_id)
-            or await elem.inner_text()
-            or await elem.get_attribute("aria-label")
-            or await elem.get_attribute("placeholder")
-            or "No description",
-            "is_dropdown": await elem.evaluate('el => el.tagName.toLowerCase() === "select"'),
-        }
+    async def map_page(self, page: "Page") -> ElementIndex:
+        """Map the elements of another page, such as a background tab, without marking them on screen."""
+        return await self._map_elements(await self._detect_elements(page), add_visuals=False)
 
-    async def _map_elements(self, elements: list[dict[str, Any]]) -> dict[int, dict[str, Any]]:
-        """Map detected elements to a numbered dictionary."""
+    async def _map_elements(
+        self,
+        elements: list[dict[str, Any]],
+        *,
+        add_visuals: bool = True,
+    ) -> ElementIndex:
+        """Map detected elements to a numbered, indexed collection."""
         mapped = {}
+        unused = []
         for idx, element in enumerate(elements, start=1):
             if element["description"].strip() == "No description":
+                unused.append(element["element"])
                 continue
 
             mapped_type = self._determine_element_type(element)
-            mapped[idx] = {
-                "element": element["element"],
-                "bbox": element["bbox"],
-                "type": mapped_type,
-                "description": element["description"].strip(),
-            }
-
-            if self.show_visuals:
+            mapped[idx] = ElementInfo(
+                element=element["element"],
+                bbox=element["bbox"],
+                type=mapped_type,
+                description=element["description"].strip(),
+                href=element.get("href"),
+                id=element.get("id"),
+                input_type=element.get("type"),
+            )
+
+            if self.show_visuals and add_visuals:
                 await self._add_visual_marker(idx, element["bbox"], mapped_type)
 
-        return mapped
+        await self._dispose_handles(unused)
+        return ElementIndex(mapped)
 
     @staticmethod
     def _determine_element_type(element: dict[str, Any]) -> str:
@@ -217,6 +418,79 @@ class Navigator:
             document.body.appendChild(div);
         }}""")
 
+    async def perform_actions(
+        self,
+        actions: list[dict[str, Any]],
+        mapped_elements: ElementIndex,
+        plugin_manager: PluginManager,
+    ) -> dict[str, Any] | None:
+        """Perform a decision's actions in order, batching runs of inputs; return the first failed action."""
+        index = 0
+        while index < len(actions):
+            batch = []
+            while index + len(batch) < len(actions) and actions[index + len(batch)]["type"] == "input":
+                batch.append(actions[index + len(batch)])
+            if len(batch) > 1:
+                failed = await self.perform_bulk_fill(batch, mapped_elements, plugin_manager)
+                if failed:
+                    return failed
+                index += len(batch)
+                continue
+            if not await self.perform_action(actions[index], mapped_elements, plugin_manager):
+                return actions[index]
+            index += 1
+        return None
+
+    async def perform_bulk_fill(
+        self,
+        actions: list[dict[str, Any]],
+        mapped_elements: ElementIndex,
+        plugin_manager: PluginManager,
+    ) -> dict[str, Any] | None:
+        """Fill several inputs in one in-page operation, falling back to per-element fills for failures."""
+        missing = [action for action in actions if action.get("element") not in mapped_elements]
+        if missing:
+            self.logger.error("Elements %s not found on the page.", [action.get("element") for action in missing])
+            await plugin_manager.handle_event("error", {"error": "Action execution failed", "action": missing[0]})
+            return missing[0]
+
+        try:
+            plugin_action = await plugin_manager.pre_decision(
+                {"actions": actions, "elements": mapped_elements, "url": self.page.url},
+            )
+            for action in actions:
+                action.update(plugin_action)
+
+            self.logger.info(
+                "Filling %s fields at once: %s",
+                len(actions),
+                ", ".join(f"{a['element']} ({mapped_elements[a['element']]['description']})" for a in actions),
+            )
+            results = await self.page.evaluate(
+                BULK_FILL_SCRIPT,
+                [[mapped_elements[action["element"]]["element"], action["text"]] for action in actions],
+            )
+
+            failed_action = None
+            for action, result in zip(actions, results, strict=True):
+                if result["ok"]:
+                    continue
+                self.logger.debug("Bulk fill of element %s failed (%s); retrying", action["element"], result["reason"])
+                if not await self._execute_action(action, mapped_elements):
+                    failed_action = action
+                    break
+
+            await plugin_manager.post_decision(
+                {"actions": actions, "success": failed_action is None},
+                {"elements": mapped_elements},
+            )
+        except Exception:
+            self.logger.exception("Error performing bulk fill")
+            await plugin_manager.handle_event("error", {"error": "Bulk fill failed", "actions": actions})
+            return actions[0]
+        else:
+            return failed_action
+
     async def perform_action(
         self,
         action: dict[str, Any],
@@ -263,6 +537,8 @@ class Navigator:
                     action["element"],
                     element_info["description"],
                 )
+                if self.prefetcher and element_info.get("href") and await self._adopt_prefetched(element_info["href"]):
+                    return True
                 await element_info["element"].click()
                 return True
             case "input":
@@ -277,11 +553,52 @@ class Navigator:
                     element_info["description"],
                 )
                 return await self._safe_fill(element_info["element"], action["text"])
+            case "scroll":
+                direction = -1 if action.get("direction") == "up" else 1
+                self.logger.info("Scrolling %s", action.get("direction", "down"))
+                await self.page.evaluate("(dy) => window.scrollBy(0, dy)", direction * self.viewport["height"] * 0.8)
+                await asyncio.sleep(1)
+                return True
+            case "next_page":
+                return await self._go_to_next_page()
             case _:
                 msg = f"Unknown action type: {action['type']}"
                 raise NavigatorException(msg)
 
-    async def _safe_fill(self, element: ElementHandle, text: str) -> bool:
+    async def _go_to_next_page(self) -> bool:
+        """Follow the page's "next" link, or scroll to the bottom to load more on infinite-scroll pages."""
+        next_link = self.page.locator('a[rel="next"]').or_(
+            self.page.get_by_role("link", name=NEXT_PAGE_PATTERN).or_(
+                self.page.get_by_role("button", name=NEXT_PAGE_PATTERN),
+            ),
+        )
+        if await next_link.count():
+            self.logger.info("Going to the next page")
+            await next_link.first.click()
+            await self.page.wait_for_load_state("domcontentloaded")
+        else:
+            self.logger.info("No next page link found. Scrolling to the bottom to load more content")
+            await self.page.evaluate("() => window.scrollTo(0, document.body.scrollHeight)")
+            await asyncio.sleep(2)
+        return True
+
+    async def _adopt_prefetched(self, href: str) -> bool:
+        """Swap in a page the prefetcher already loaded for this link instead of clicking it."""
+        prefetched = await self.prefetcher.take(href)
+        if not prefetched:
+            return False
+        page, elements = prefetched
+        await self.page.close()
+        self.page = page
+        await page.bring_to_front()
+        self._adopted_url, self._adopted_elements = page.url, elements
+        if elements and self.show_visuals:
+            for number, info in elements.items():
+                await self._add_visual_marker(number, info["bbox"], info["type"])
+        self.logger.info("Using prefetched page for %s", href)
+        return True
+
+    async def _safe_fill(self, element: "ElementHandle", text: str) -> bool:
         """Safely fill an input element with text."""
         if await self._is_input_element(element):
             await element.fill(text)
@@ -290,7 +607,7 @@ class Navigator:
         return False
 
     @staticmethod
-    async def _is_input_element(element: ElementHandle) -> bool:
+    async def _is_input_element(element: "ElementHandle") -> bool:
         """Check if an element is an input element."""
         tag_name = await element.evaluate("el => el.tagName.toLowerCase()")
         is_contenteditable = await element.evaluate("el => el.getAttribute('contenteditable') === 'true'")
@@ -2,9 +2,10 @@ import asyncio
 import json
 import os
 import subprocess
-from typing import Any
+from typing import Any, ClassVar
 from urllib.parse import urlparse
 
+from element_index import ElementIndex
 from plugins.plugin_interface import PluginInterface
 from utils import get_logger
 
@@ -13,6 +14,9 @@ logger = get_logger()
 
 
 class BitwardenPlugin(PluginInterface):
+    # Only login pages need credentials.
+    triggers: ClassVar[dict[str, list[str]]] = {"element_keywords": ["password"]}
+
     async def initialize(self) -> None:
         self.session_key = os.getenv("BW_SESSION")
         if not self.session_key:
@@ -77,6 +81,8 @@ class BitwardenPlugin(PluginInterface):
 
     @staticmethod
     def detect_login_form(elements: dict[int, dict[str, Any]]) -> bool:
+        if isinstance(elements, ElementIndex):
+            return elements.contains_any(("username", "email")) and elements.contains_any(("password",))
         has_username = any(
             "username" in e["description"].lower() or "email" in e["description"].lower() for e in elements.values()
         )
@@ -1,8 +1,13 @@
 from abc import ABC, abstractmethod
-from typing import Any
+from typing import Any, ClassVar
 
 
 class PluginInterface(ABC):
+    # Activation triggers: "events" (hook or event names), "urls" (glob patterns) and
+    # "element_keywords" (matched against element types and descriptions). Every listed
+    # kind must match for the plugin to be called; no triggers means it is always called.
+    triggers: ClassVar[dict[str, list[str]]] = {}
+
     @abstractmethod
     async def initialize(self) -> None:
         """Initialize the plugin."""
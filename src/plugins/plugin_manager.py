@@ -1,9 +1,11 @@
 import asyncio
 import importlib
 import json
+from fnmatch import fnmatch
 from pathlib import Path
 from typing import TYPE_CHECKING, Any
 
+from element_index import ElementIndex, tokenize
 from utils import get_logger
 
 
@@ -19,15 +21,37 @@ class PluginManager:
         self.config_file = config_file
         self.plugins: dict[str, PluginInterface] = {}
         self.config: dict[str, dict[str, Any]] = {}
+        self.triggers: dict[str, dict[str, list[str]]] = {}
+        self.pending: dict[str, dict[str, list[str]]] = {}
+        self._activation_lock = asyncio.Lock()
 
     async def load_plugins(self) -> None:
-        """Load and initialize all plugins."""
+        """Load and initialize enabled plugins; those with triggers wait until first needed."""
         self._load_config()
+        undeclared = []
         for filename in Path(self.plugin_dir).iterdir():
             if filename.suffix == ".py" and not filename.name.startswith("__"):
                 plugin_name = filename.stem
                 if plugin_name in self.config and self.config[plugin_name].get("enabled", True):
-                    await self._load_plugin(plugin_name)
+                    triggers = self.config[plugin_name].get("triggers")
+                    if triggers:
+                        self.pending[plugin_name] = triggers
+                        logger.debug("Deferring plugin %s until triggered", plugin_name)
+                    else:
+                        undeclared.append(plugin_name)
+
+        # Importing is cheap; initializing (e.g. talking to an external CLI) waits for the class's own triggers.
+        classes = await asyncio.gather(*(self._import_plugin(plugin_name) for plugin_name in undeclared))
+        eager = []
+        for plugin_name, plugin_class in zip(undeclared, classes, strict=True):
+            if plugin_class is None:
+                continue
+            if plugin_class.triggers:
+                self.pending[plugin_name] = plugin_class.triggers
+                logger.debug("Deferring plugin %s until triggered", plugin_name)
+            else:
+                eager.append(plugin_name)
+        await asyncio.gather(*(self._load_plugin(plugin_name) for plugin_name in eager))
 
     def _load_config(self) -> None:
         """Load the plugin configuration."""
@@ -38,31 +62,78 @@ class PluginManager:
             logger.warning("Config file %s not found. Using default configurations.", self.config_file)
             self.config = {}
 
-    async def _load_plugin(self, plugin_name: str) -> None:
+    @staticmethod
+    async def _import_plugin(plugin_name: str) -> "type[PluginInterface] | None":
+        """Import a plugin's class without instantiating it."""
+        try:
+            module = await asyncio.to_thread(importlib.import_module, f"plugins.{plugin_name}")
+            return getattr(module, f"{plugin_name.capitalize()}Plugin")
+        except Exception:
+            logger.exception("Failed to import plugin %s", plugin_name)
+            return None
+
+    async def _load_plugin(self, plugin_name: str, triggers: dict[str, list[str]] | None = None) -> None:
         """Load a single plugin."""
+        plugin_class = await self._import_plugin(plugin_name)
+        if plugin_class is None:
+            return
         try:
-            module = importlib.import_module(f"plugins.{plugin_name}")
-            plugin_class: type[PluginInterface] = getattr(module, f"{plugin_name.capitalize()}Plugin")
             plugin = plugin_class()
             await plugin.initialize()
             self.plugins[plugin_name] = plugin
+            self.triggers[plugin_name] = triggers if triggers is not None else plugin_class.triggers
             logger.info("Loaded plugin: %s", plugin_name)
         except Exception:
             logger.exception("Failed to load plugin %s", plugin_name)
 
+    @staticmethod
+    def _matches(triggers: dict[str, list[str]], event_type: str, context: dict[str, Any]) -> bool:
+        """Check whether a hook call satisfies every kind of trigger a plugin declares."""
+        if (events := triggers.get("events")) and event_type not in events:
+            return False
+        if (urls := triggers.get("urls")) and not any(fnmatch(context.get("url") or "", p) for p in urls):
+            return False
+        if keywords := triggers.get("element_keywords"):
+            elements = context.get("elements") or {}
+            if isinstance(elements, ElementIndex):
+                return any(elements.of_type(keyword) for keyword in keywords) or elements.contains_any(keywords)
+            phrases = [" ".join(tokenize(keyword)) for keyword in keywords]
+            return any(
+                keyword == info["type"] or phrase in " ".join(tokenize(info["description"]))
+                for info in elements.values()
+                for keyword, phrase in zip(keywords, phrases, strict=True)
+            )
+        return True
+
+    async def _plugins_for(self, event_type: str, context: dict[str, Any]) -> list["PluginInterface"]:
+        """Activate pending plugins whose triggers now match, then return the plugins to call."""
+        triggered = [name for name, triggers in self.pending.items() if self._matches(triggers, event_type, context)]
+        if triggered:
+            async with self._activation_lock:
+                to_load = {name: self.pending.pop(name) for name in triggered if name in self.pending}
+                await asyncio.gather(*(self._load_plugin(name, triggers) for name, triggers in to_load.items()))
+        return [
+            plugin
+            for name, plugin in self.plugins.items()
+            if self._matches(self.triggers.get(name, {}), event_type, context)
+        ]
+
     async def cleanup_plugins(self) -> None:
         """Clean up all plugins."""
         await asyncio.gather(*(plugin.cleanup() for plugin in self.plugins.values()))
 
     async def handle_event(self, event_type: str, event_data: dict[str, Any]) -> None:
-        """Distribute an event to all plugins."""
-        await asyncio.gather(*(plugin.handle_event(event_type, event_data) for plugin in self.plugins.values()))
+        """Distribute an event to the plugins it triggers."""
+        plugins = await self._plugins_for(event_type, event_data)
+        await asyncio.gather(*(plugin.handle_event(event_type, event_data) for plugin in plugins))
 
     async def pre_decision(self, context: dict[str, Any]) -> dict[str, Any]:
-        """Run pre-decision hooks for all plugins."""
-        results = await asyncio.gather(*(plugin.pre_decision(context) for plugin in self.plugins.values()))
+        """Run pre-decision hooks for the plugins it triggers."""
+        plugins = await self._plugins_for("pre_decision", context)
+        results = await asyncio.gather(*(plugin.pre_decision(context) for plugin in plugins))
         return {k: v for d in results for k, v in d.items()}
 
     async def post_decision(self, decision: dict[str, Any], context: dict[str, Any]) -> None:
-        """Run post-decision hooks for all plugins."""
-        await asyncio.gather(*(plugin.post_decision(decision, context) for plugin in self.plugins.values()))
+        """Run post-decision hooks for the plugins it triggers."""
+        plugins = await self._plugins_for("post_decision", context)
+        await asyncio.gather(*(plugin.post_decision(decision, context) for plugin in plugins))
@@ -0,0 +1,132 @@
+import asyncio
+import re
+from typing import TYPE_CHECKING, Any
+from urllib.parse import urldefrag
+
+from utils import get_logger
+
+
+if TYPE_CHECKING:
+    from playwright.async_api import Page, Response
+
+    from element_index import ElementIndex
+    from navigator import Navigator
+
+
+HTTP_ERROR_STATUS = 400
+STOP_WORDS = {"the", "and", "for", "with", "then", "that", "this", "from", "into", "open", "click", "find", "go", "to"}
+# Following these links may change state (sign out, delete, buy...), so they are never fetched speculatively.
+SIDE_EFFECT_PATTERN = re.compile(
+    r"\b(?:log ?out|sign ?out|delete|remove|destroy|unsubscribe|subscribe|cancel|add to (?:cart|basket|bag)|"
+    r"checkout|buy|purchase|order|pay|confirm|approve|accept|decline|reject|archive|block|report|vote|"
+    r"like|unlike|follow|unfollow|reset|revoke|disable|enable)\b",
+)
+
+
+def has_side_effects(text: str) -> bool:
+    """Whether a link's text or URL suggests that visiting it does something rather than shows something."""
+    return bool(SIDE_EFFECT_PATTERN.search(" ".join(re.findall(r"[a-z0-9]+", text.lower()))))
+
+
+def task_tokens(text: str) -> set[str]:
+    """Lower-cased words of three or more characters, minus common filler words."""
+    return {word for word in re.findall(r"[a-z0-9]{3,}", text.lower()) if word not in STOP_WORDS}
+
+
+class Prefetcher:
+    """Loads the most likely next pages in background tabs while the model is deciding."""
+
+    def __init__(self, max_candidates: int = 3, *, premap: bool = False) -> None:
+        self.logger = get_logger()
+        self.max_candidates = max_candidates
+        self.premap = premap
+        self.navigator: Navigator | None = None
+        self.entries: dict[str, dict[str, Any]] = {}
+        self.stats = {"prefetched": 0, "hits": 0, "misses": 0, "wasted_bytes": 0, "used_bytes": 0}
+
+    def rank_candidates(self, mapped_elements: "ElementIndex", task: str, current_url: str) -> list[str]:
+        """Return the link targets whose text best matches the task, best first."""
+        wanted = task_tokens(task)
+        current = urldefrag(current_url)[0]
+        scores: dict[str, int] = {}
+        for number in mapped_elements.of_type("clickable"):
+            href = mapped_elements[number].get("href")
+            if not href or not href.startswith(("http://", "https://")):
+                continue
+            href = urldefrag(href)[0]
+            if href == current or has_side_effects(f"{mapped_elements[number]['description']} {href}"):
+                continue
+            score = len(wanted & task_tokens(f"{mapped_elements.normalized[number]} {href}"))
+            if score:
+                scores[href] = max(score, scores.get(href, 0))
+        return sorted(scores, key=lambda href: -scores[href])[: self.max_candidates]
+
+    async def start(self, mapped_elements: "ElementIndex", task: str, current_url: str) -> None:
+        """Drop the previous round and begin prefetching the top candidates for the current page."""
+        await self.discard()
+        if not self.navigator or not self.navigator.context:
+            return
+        for href in self.rank_candidates(mapped_elements, task, current_url):
+            entry: dict[str, Any] = {"page": None, "bytes": 0}
+            entry["task"] = asyncio.create_task(self._prefetch(href, entry))
+            self.entries[href] = entry
+
+    async def _prefetch(self, href: str, entry: dict[str, Any]) -> "ElementIndex | None":
+        page = await self.navigator.context.new_page()
+        entry["page"] = page
+
+        def count_bytes(response: "Response") -> None:
+            entry["bytes"] += int(response.headers.get("content-length", 0) or 0)
+
+        page.on("response", count_bytes)
+        response = await page.goto(href, wait_until="domcontentloaded", timeout=self.navigator.page_load_timeout)
+        if not response or response.status >= HTTP_ERROR_STATUS:
+            msg = f"Prefetch of {href} returned {response.status if response else 'no response'}"
+            raise RuntimeError(msg)
+        self.stats["prefetched"] += 1
+        if self.premap:
+            return await self.navigator.map_page(page)
+        return None
+
+    async def take(self, href: str) -> "tuple[Page, ElementIndex | None] | None":
+        """Hand over the prefetched page for a link, if there is a usable one, and drop the rest."""
+        entry = self.entries.pop(urldefrag(href)[0], None)
+        result = None
+        if entry:
+            # Wait without raising: a failed or cancelled prefetch is just a miss.
+            done, _ = await asyncio.wait({entry["task"]})
+            prefetch = done.pop()
+            error = None if prefetch.cancelled() else prefetch.exception()
+            if prefetch.cancelled() or error:
+                self.logger.debug("Prefetched page for %s is unusable: %s", href, error or "cancelled")
+                self.entries[href] = entry
+            else:
+                result = (entry["page"], prefetch.result())
+                self.stats["hits"] += 1
+                self.stats["used_bytes"] += entry["bytes"]
+        if result is None:
+            self.stats["misses"] += 1
+        await self.discard()
+        return result
+
+    async def discard(self) -> None:
+        """Cancel outstanding prefetches and close their pages, counting their traffic as wasted."""
+        entries, self.entries = self.entries, {}
+        for entry in entries.values():
+            entry["task"].cancel()
+        await asyncio.gather(*(entry["task"] for entry in entries.values()), return_exceptions=True)
+        pages = [entry["page"] for entry in entries.values() if entry["page"] and not entry["page"].is_closed()]
+        for entry in entries.values():
+            self.stats["wasted_bytes"] += entry["bytes"]
+        for outcome in await asyncio.gather(*(page.close() for page in pages), return_exceptions=True):
+            if isinstance(outcome, Exception):
+                self.logger.debug("Failed to close prefetched page: %s", outcome)
+
+    def report(self) -> str:
+        attempts = self.stats["hits"] + self.stats["misses"]
+        hit_rate = self.stats["hits"] / attempts if attempts else 0.0
+        return (
+            f"Prefetch: {self.stats['prefetched']} page(s) loaded, {self.stats['hits']} hit(s), "
+            f"{self.stats['misses']} miss(es), hit rate {hit_rate:.0%}, "
+            f"{self.stats['used_bytes']} bytes used, {self.stats['wasted_bytes']} bytes wasted"
+        )
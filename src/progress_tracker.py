@@ -0,0 +1,86 @@
+import hashlib
+from collections import deque
+from collections.abc import Callable, Mapping
+from typing import Any
+
+from utils import get_logger
+
+
+WARNING_NOTE = (
+    "Warning: your recent actions did not make progress ({reason}). "
+    "Do not repeat them; try a different element or approach."
+)
+
+
+def state_fingerprint(url: str, mapped_elements: Mapping[int, Any]) -> str:
+    """Hash the URL together with the element map, reusing the index's fingerprint when present."""
+    elements_hash = getattr(mapped_elements, "fingerprint", None)
+    if elements_hash is None:
+        elements_hash = hashlib.sha1(
+            "\n".join(f"{num}:{info['description']}:{info['type']}" for num, info in mapped_elements.items()).encode(),
+            usedforsecurity=False,
+        ).hexdigest()
+    return hashlib.sha1(f"{url}\n{elements_hash}".encode(), usedforsecurity=False).hexdigest()
+
+
+class ProgressTracker:
+    """
+    Detects steps that make no progress and decides how to respond.
+
+    Each step is fingerprinted as (page state, decision). Seeing the same pair again within
+    the window is a cycle; an action that leaves the page state unchanged is a no-op.
+    Consecutive problems escalate: first a corrective note, then a stronger model, then stopping.
+    ``escalate`` switches to a stronger model and reports whether there was one; without one the
+    escalation stage is skipped.
+    """
+
+    RESPONSES = ("warn", "escalate", "stop")
+
+    def __init__(self, window: int = 8, escalate: Callable[[], bool] | None = None) -> None:
+        self.logger = get_logger()
+        self.escalate = escalate
+        self.recent: deque[str] = deque(maxlen=window)
+        self.strikes = 0
+        self.metrics = {"steps": 0, "cycles": 0, "no_ops": 0, "warnings": 0, "escalations": 0, "stops": 0}
+
+    def check_decision(self, state: str, decision: str) -> str | None:
+        """Record a decision taken in a state and return a reason if it repeats an earlier step."""
+        self.metrics["steps"] += 1
+        step = hashlib.sha1(
+            f"{state}\n{' '.join(decision.upper().split())}".encode(),
+            usedforsecurity=False,
+        ).hexdigest()
+        repeated = step in self.recent
+        self.recent.append(step)
+        if repeated:
+            self.metrics["cycles"] += 1
+            return "the same decision was already made on this exact page"
+        return None
+
+    def check_outcome(self, state_before: str, state_after: str) -> str | None:
+        """Return a reason if the actions left the page state unchanged."""
+        if state_before == state_after:
+            self.metrics["no_ops"] += 1
+            return "the page did not change after the actions"
+        return None
+
+    def respond(self, reason: str | None) -> str | None:
+        """Turn the latest finding into a response ("warn", "escalate" or "stop"), or None if on track."""
+        if reason is None:
+            self.strikes = 0
+            return None
+        self.strikes += 1
+        response = self.RESPONSES[min(self.strikes, len(self.RESPONSES)) - 1]
+        if response == "escalate" and not (self.escalate and self.escalate()):
+            self.strikes += 1
+            response = "stop"
+        self.metrics[{"warn": "warnings", "escalate": "escalations", "stop": "stops"}[response]] += 1
+        self.logger.warning("No progress detected (%s); responding with %s", reason, response)
+        return response
+
+    @staticmethod
+    def note(reason: str) -> str:
+        return WARNING_NOTE.format(reason=reason)
+
+    def report(self) -> str:
+        return "Progress: " + ", ".join(f"{key} {value}" for key, value in self.metrics.items())
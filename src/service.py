@@ -0,0 +1,313 @@
+import asyncio
+import json
+import time
+import uuid
+from typing import Any
+
+from budget import BUDGET_KEYS, BudgetTracker
+from decision_maker import DecisionMaker
+from navigator import Navigator
+from plugins.plugin_manager import PluginManager
+from task_runner import execute_task
+from utils import get_logger
+
+
+HTTP_REASONS = {200: "OK", 202: "Accepted", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed"}
+
+
+class TaskRecord:
+    """State and event history of one submitted task."""
+
+    def __init__(self, task: str, budget: dict[str, float]) -> None:
+        self.id = uuid.uuid4().hex[:12]
+        self.task = task
+        self.budget = budget
+        self.status = "queued"
+        self.completed: bool | None = None
+        self.submitted_at = time.monotonic()
+        self.finished_at: float | None = None
+        self.events: list[dict[str, Any]] = []
+        self.changed = asyncio.Condition()
+
+    @property
+    def done(self) -> bool:
+        return self.status in ("finished", "failed")
+
+    async def add_event(self, event_type: str, data: dict[str, Any]) -> None:
+        async with self.changed:
+            self.events.append({"event": event_type, "time": time.time(), **data})
+            self.changed.notify_all()
+
+    async def set_status(self, status: str) -> None:
+        async with self.changed:
+            self.status = status
+            if self.done:
+                self.finished_at = time.monotonic()
+            self.changed.notify_all()
+
+    def summary(self) -> dict[str, Any]:
+        return {"id": self.id, "task": self.task, "status": self.status, "completed": self.completed}
+
+
+class AgentService:
+    """
+    Keeps the browser, model client and plugins warm and runs tasks submitted over HTTP.
+
+    ``navigator`` hosts the shared browser and its settings are used for every task's context;
+    each task gets a fork of ``decision_maker``.
+    """
+
+    # Finished tasks are kept for polling until they are this old, or until there are too many.
+    FINISHED_TTL = 3600
+    MAX_FINISHED_TASKS = 1000
+
+    def __init__(
+        self,
+        navigator: Navigator,
+        decision_maker: DecisionMaker,
+        plugin_manager: PluginManager,
+        *,
+        max_concurrent: int = 4,
+    ) -> None:
+        self.logger = get_logger()
+        self.browser_host = navigator
+        self.decision_maker = decision_maker
+        self.model_manager = decision_maker.model_manager
+        self.plugin_manager = plugin_manager
+        self.max_concurrent = max_concurrent
+        self.slots = asyncio.Semaphore(max_concurrent)
+        self.idle_navigators: list[Navigator] = []
+        self.tasks: dict[str, TaskRecord] = {}
+        self._workers: set[asyncio.Task] = set()
+        self.metrics = {
+            "tasks_submitted": 0,
+            "tasks_completed": 0,
+            "tasks_failed": 0,
+            "tasks_running": 0,
+            "steps_total": 0,
+            "loops_detected_total": 0,
+            "contexts_created": 0,
+            "contexts_recycled": 0,
+            "start_latency_seconds_total": 0.0,
+        }
+        self.started_at = time.monotonic()
+
+    async def start(self) -> None:
+        """Warm up the browser, model client and plugins before accepting tasks."""
+        self.browser_host.start()
+        await asyncio.gather(
+            self.browser_host.ensure_browser(),
+            asyncio.to_thread(self.model_manager.warm_up),
+            self.plugin_manager.load_plugins(),
+        )
+        self.logger.info("Service warmed up in %.2fs", time.monotonic() - self.started_at)
+
+    async def stop(self) -> None:
+        """Cancel running tasks first, so their contexts are back in the pool before everything is closed."""
+        workers = list(self._workers)
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        for navigator in self.idle_navigators:
+            await navigator.cleanup()
+        await self.plugin_manager.cleanup_plugins()
+        await self.browser_host.cleanup()
+
+    def _evict_finished(self) -> None:
+        """Forget finished tasks older than the TTL, and the oldest ones beyond the cap."""
+        finished = sorted(
+            (record for record in self.tasks.values() if record.done),
+            key=lambda record: record.finished_at,
+        )
+        expired = time.monotonic() - self.FINISHED_TTL
+        excess = len(finished) - self.MAX_FINISHED_TASKS
+        for index, record in enumerate(finished):
+            if index < excess or record.finished_at < expired:
+                del self.tasks[record.id]
+
+    def submit(self, task: str, budget: dict[str, float] | None = None) -> TaskRecord:
+        self._evict_finished()
+        record = TaskRecord(task, budget or {})
+        self.tasks[record.id] = record
+        self.metrics["tasks_submitted"] += 1
+        worker = asyncio.create_task(self._run(record))
+        self._workers.add(worker)
+        worker.add_done_callback(self._workers.discard)
+        return record
+
+    async def _acquire_navigator(self) -> Navigator:
+        if self.idle_navigators:
+            return self.idle_navigators.pop()
+        navigator = Navigator(
+            headless=self.browser_host.headless,
+            detection_method=self.browser_host.detection_method,
+            session_store=self.browser_host.session_store,
+            browser=self.browser_host.browser,
+        )
+        await navigator.ensure_browser()
+        self.metrics["contexts_created"] += 1
+        return navigator
+
+    async def _release_navigator(self, navigator: Navigator) -> None:
+        try:
+            await navigator.recycle()
+        except Exception:
+            self.logger.exception("Failed to recycle browser context; discarding it")
+            await navigator.cleanup()
+            return
+        self.metrics["contexts_recycled"] += 1
+        self.idle_navigators.append(navigator)
+
+    async def _run(self, record: TaskRecord) -> None:
+        async with self.slots:
+            self.metrics["tasks_running"] += 1
+            await record.set_status("running")
+
+            async def on_event(event_type: str, data: dict[str, Any]) -> None:
+                if event_type == "started":
+                    self.metrics["start_latency_seconds_total"] += time.monotonic() - record.submitted_at
+                elif event_type == "step":
+                    self.metrics["steps_total"] += 1
+                elif event_type == "loop_detected":
+                    self.metrics["loops_detected_total"] += 1
+                await record.add_event(event_type, data)
+
+            decision_maker = self.decision_maker.fork()
+            navigator = None
+            try:
+                navigator = await self._acquire_navigator()
+                record.completed = await execute_task(
+                    record.task,
+                    navigator,
+                    decision_maker,
+                    self.plugin_manager,
+                    budget=BudgetTracker(record.budget),
+                    on_event=on_event,
+                )
+                self.metrics["tasks_completed" if record.completed else "tasks_failed"] += 1
+                await record.set_status("finished")
+            except Exception as e:
+                self.logger.exception("Task %s crashed", record.id)
+                self.metrics["tasks_failed"] += 1
+                await record.add_event("error", {"error": str(e)})
+                await record.set_status("failed")
+            finally:
+                self.metrics["tasks_running"] -= 1
+                if navigator:
+                    await self._release_navigator(navigator)
+
+    async def serve(self, host: str = "127.0.0.1", port: int = 8765, socket_path: str | None = None) -> None:
+        """Accept HTTP requests on a TCP port or a Unix socket until cancelled."""
+        if socket_path:
+            server = await asyncio.start_unix_server(self._handle_connection, path=socket_path)
+            self.logger.info("Service listening on unix:%s", socket_path)
+        else:
+            server = await asyncio.start_server(self._handle_connection, host, port)
+            self.logger.info("Service listening on http://%s:%s", host, port)
+        async with server:
+            await server.serve_forever()
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            request_line = (await reader.readline()).decode().strip()
+            if not request_line:
+                return
+            method, path, _ = request_line.split(" ", 2)
+            headers = {}
+            while (line := (await reader.readline()).decode().strip()) != "":
+                name, _, value = line.partition(":")
+                headers[name.strip().lower()] = value.strip()
+            body = await reader.readexactly(int(headers.get("content-length", 0)))
+            await self._route(method, path.rstrip("/") or "/", body, writer)
+        except Exception:
+            self.logger.exception("Error handling service request")
+        finally:
+            writer.close()
+
+    async def _route(self, method: str, path: str, body: bytes, writer: asyncio.StreamWriter) -> None:
+        parts = path.strip("/").split("/")
+        match method, parts:
+            case "GET", ["health"]:
+                await self._respond(writer, 200, self.health())
+            case "GET", ["metrics"]:
+                await self._respond(writer, 200, self.render_metrics(), content_type="text/plain; version=0.0.4")
+            case "GET", ["tasks"]:
+                self._evict_finished()
+                await self._respond(writer, 200, [record.summary() for record in self.tasks.values()])
+            case "POST", ["tasks"]:
+                try:
+                    payload = json.loads(body or b"{}")
+                    task = payload["task"]
+                    budget = {key: float(value) for key, value in payload.get("budget", {}).items()}
+                except (json.JSONDecodeError, KeyError, TypeError, ValueError, AttributeError):
+                    await self._respond(writer, 400, {"error": "Expected a JSON body with a 'task' field"})
+                    return
+                if unknown := set(budget) - set(BUDGET_KEYS):
+                    await self._respond(writer, 400, {"error": f"Unknown budget keys: {sorted(unknown)}"})
+                    return
+                record = self.submit(task, budget)
+                await self._respond(writer, 202, record.summary())
+            case "GET", ["tasks", task_id] if task_id in self.tasks:
+                record = self.tasks[task_id]
+                await self._respond(writer, 200, {**record.summary(), "events": record.events})
+            case "GET", ["tasks", task_id, "events"] if task_id in self.tasks:
+                await self._stream_events(self.tasks[task_id], writer)
+            case "GET", _:
+                await self._respond(writer, 404, {"error": f"Unknown path {path}"})
+            case _:
+                await self._respond(writer, 405, {"error": f"Method {method} not allowed"})
+
+    @staticmethod
+    async def _respond(
+        writer: asyncio.StreamWriter,
+        status: int,
+        payload: str | dict[str, Any] | list[dict[str, Any]],
+        content_type: str = "application/json",
+    ) -> None:
+        body = payload.encode() if isinstance(payload, str) else json.dumps(payload, default=str).encode()
+        writer.write(
+            f"HTTP/1.1 {status} {HTTP_REASONS[status]}\r\n"
+            f"Content-Type: {content_type}\r\nContent-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode()
+            + body,
+        )
+        await writer.drain()
+
+    @staticmethod
+    async def _stream_events(record: TaskRecord, writer: asyncio.StreamWriter) -> None:
+        """Send the task's events as chunked newline-delimited JSON until the task is done."""
+        writer.write(
+            b"HTTP/1.1 200 OK\r\nContent-Type: application/x-ndjson\r\n"
+            b"Transfer-Encoding: chunked\r\nConnection: close\r\n\r\n",
+        )
+        sent = 0
+        while True:
+            async with record.changed:
+                await record.changed.wait_for(lambda sent=sent: len(record.events) > sent or record.done)
+                pending, done = record.events[sent:], record.done
+            for event in pending:
+                chunk = (json.dumps(event, default=str) + "\n").encode()
+                writer.write(f"{len(chunk):x}\r\n".encode() + chunk + b"\r\n")
+            sent += len(pending)
+            await writer.drain()
+            if done and sent == len(record.events):
+                break
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+
+    def health(self) -> dict[str, Any]:
+        browser = self.browser_host.browser
+        return {
+            "status": "ok" if browser and browser.is_connected() else "degraded",
+            "uptime_seconds": round(time.monotonic() - self.started_at, 1),
+            "running": self.metrics["tasks_running"],
+            "idle_contexts": len(self.idle_navigators),
+            "max_concurrent": self.max_concurrent,
+        }
+
+    def render_metrics(self) -> str:
+        """Render counters in the Prometheus text exposition format."""
+        lines = []
+        for name, value in self.metrics.items():
+            kind = "gauge" if name == "tasks_running" else "counter"
+            lines.extend([f"# TYPE webtalk_{name} {kind}", f"webtalk_{name} {value}"])
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,119 @@
+import json
+import os
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from utils import get_logger
+
+
+if TYPE_CHECKING:
+    from cryptography.fernet import Fernet
+
+
+class SessionStoreError(Exception):
+    """Base exception for SessionStore class."""
+
+
+class SessionStore:
+    """Encrypted on-disk store for Playwright storage state, keyed by site profile."""
+
+    KEY_ENV_VAR = "WEBTALK_STATE_KEY"
+
+    def __init__(self, storage_dir: str = ".webtalk/sessions", max_age: float = 7 * 24 * 3600) -> None:
+        self.logger = get_logger()
+        self.storage_dir = Path(storage_dir)
+        self.max_age = max_age
+        self._fernet: Fernet | None = None
+
+    @staticmethod
+    def _fernet_class() -> "type[Fernet]":
+        try:
+            from cryptography.fernet import Fernet
+        except ImportError as e:
+            msg = "The 'cryptography' package is required for persistent sessions."
+            raise SessionStoreError(msg) from e
+        return Fernet
+
+    @classmethod
+    def ensure_key(cls) -> str:
+        """
+        Return the encryption key, generating one and saving it to .env if there is none yet.
+
+        Call this before starting processes that share the store, so they all inherit the same key.
+        """
+        key = os.getenv(cls.KEY_ENV_VAR)
+        if not key:
+            key = cls._fernet_class().generate_key().decode()
+            os.environ[cls.KEY_ENV_VAR] = key
+            with Path(".env").open("a") as f:
+                f.write(f"\n{cls.KEY_ENV_VAR}={key}")
+            get_logger().info("Generated a new session encryption key and saved it to .env file.")
+        return key
+
+    @property
+    def fernet(self) -> "Fernet":
+        """Return the Fernet cipher, creating and saving a key on first use."""
+        if self._fernet is None:
+            self._fernet = self._fernet_class()(self.ensure_key().encode())
+        return self._fernet
+
+    def _path_for(self, profile: str) -> Path:
+        safe_name = "".join(c if c.isalnum() or c in "-_." else "_" for c in profile)
+        return self.storage_dir / f"{safe_name}.state"
+
+    def load(self, profile: str) -> dict[str, Any] | None:
+        """Return the stored storage state for a profile, or None if missing or expired."""
+        path = self._path_for(profile)
+        if not path.exists():
+            return None
+
+        try:
+            payload = json.loads(self.fernet.decrypt(path.read_bytes()))
+        except Exception:
+            self.logger.exception("Failed to read session state for %s. Discarding it.", profile)
+            self.delete(profile)
+            return None
+
+        state = self._drop_expired(payload["state"], payload["saved_at"])
+        if state is None:
+            self.logger.info("Stored session for %s has expired.", profile)
+            self.delete(profile)
+            return None
+
+        self.logger.info("Restored session state for %s", profile)
+        return state
+
+    def save(self, profile: str, state: dict[str, Any]) -> None:
+        """Encrypt and persist the storage state for a profile."""
+        self.storage_dir.mkdir(parents=True, exist_ok=True)
+        payload = json.dumps({"saved_at": time.time(), "state": state}).encode()
+        path = self._path_for(profile)
+        tmp_path = path.with_suffix(".tmp")
+        tmp_path.write_bytes(self.fernet.encrypt(payload))
+        tmp_path.chmod(0o600)
+        tmp_path.replace(path)
+        self.logger.info("Saved session state for %s", profile)
+
+    def delete(self, profile: str) -> None:
+        """Remove the stored state for a profile."""
+        self._path_for(profile).unlink(missing_ok=True)
+
+    def _drop_expired(self, state: dict[str, Any], saved_at: float) -> dict[str, Any] | None:
+        """Strip expired cookies; return None when nothing usable is left."""
+        now = time.time()
+        if now - saved_at > self.max_age:
+            return None
+
+        cookies = state.get("cookies", [])
+        live_cookies = [c for c in cookies if c.get("expires", -1) == -1 or c["expires"] > now]
+        # Every persistent cookie expiring usually means the login is gone too.
+        if any(c.get("expires", -1) != -1 for c in cookies) and not any(
+            c.get("expires", -1) != -1 for c in live_cookies
+        ):
+            return None
+
+        origins = state.get("origins", [])
+        if not live_cookies and not origins:
+            return None
+        return {"cookies": live_cookies, "origins": origins}
@@ -0,0 +1,59 @@
+import importlib
+import sys
+import time
+from types import ModuleType
+
+
+PROCESS_START = time.perf_counter()
+
+
+class StartupProfiler:
+    """Collects import timings and startup milestones relative to process start."""
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self.imports: dict[str, float] = {}
+        self.milestones: dict[str, float] = {}
+
+    def mark(self, milestone: str) -> float:
+        """Record the first time a milestone is reached and return seconds since start."""
+        return self.milestones.setdefault(milestone, time.perf_counter() - PROCESS_START)
+
+    def report(self) -> str:
+        lines = ["Startup profile:", "  Imports (first use):"]
+        lines.extend(
+            f"    {name:<30} {seconds * 1000:8.1f} ms"
+            for name, seconds in sorted(self.imports.items(), key=lambda item: -item[1])
+        )
+        lines.append("  Milestones (since process start):")
+        lines.extend(
+            f"    {name:<30} {seconds * 1000:8.1f} ms"
+            for name, seconds in sorted(self.milestones.items(), key=lambda item: item[1])
+        )
+        return "\n".join(lines)
+
+
+profiler = StartupProfiler()
+
+
+def lazy_import(module_name: str) -> ModuleType:
+    """
+    Import a module on first use and record how long the import took.
+
+    Parameters
+    ----------
+    module_name : str
+        Dotted name of the module to import.
+
+    Returns
+    -------
+    ModuleType
+        The imported module.
+    """
+    module = sys.modules.get(module_name)
+    if module is not None:
+        return module
+    started = time.perf_counter()
+    module = importlib.import_module(module_name)
+    profiler.imports.setdefault(module_name, time.perf_counter() - started)
+    return module
@@ -0,0 +1,75 @@
+import hashlib
+import json
+import time
+from pathlib import Path
+from typing import Any, TypeVar
+
+from utils import get_logger
+
+
+SECRET_KEYS = ("credentials", "password", "token", "secret", "session", "api_key")
+
+T = TypeVar("T")
+
+
+def redact(value: T) -> T:
+    """Recursively replace values stored under secret-looking keys."""
+    if isinstance(value, dict):
+        return {
+            k: "[REDACTED]" if any(s in str(k).lower() for s in SECRET_KEYS) else redact(v) for k, v in value.items()
+        }
+    if isinstance(value, list | tuple):
+        return [redact(v) for v in value]
+    return value
+
+
+class TaskJournal:
+    """Append-only JSON Lines log of task progress, used for resuming and auditing."""
+
+    def __init__(self, task: str, journal_dir: str = ".webtalk/journal", task_id: str | None = None) -> None:
+        self.logger = get_logger()
+        self.task_id = task_id or hashlib.sha1(task.encode(), usedforsecurity=False).hexdigest()[:12]
+        self.path = Path(journal_dir) / f"{self.task_id}.jsonl"
+
+    def append(self, event: str, **data: object) -> None:
+        """Write one record and flush it to disk before returning."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        record = {"event": event, "time": time.time(), **redact(data)}
+        with self.path.open("a") as f:
+            f.write(json.dumps(record, default=str) + "\n")
+            f.flush()
+
+    def records(self) -> list[dict[str, Any]]:
+        """Read back all complete records, ignoring a torn final line."""
+        if not self.path.exists():
+            return []
+        with self.path.open() as f:
+            records = [self._parse(line) for line in f]
+        return [record for record in records if record is not None]
+
+    def _parse(self, line: str) -> dict[str, Any] | None:
+        try:
+            return json.loads(line)
+        except json.JSONDecodeError:
+            self.logger.warning("Ignoring incomplete journal record in %s", self.path)
+            return None
+
+    def resume_point(self) -> dict[str, Any] | None:
+        """Return the state of the latest run to continue from, or None if there is nothing to resume."""
+        records = self.records()
+        # Every run without --resume appends its own start; only the latest run counts.
+        starts = [i for i, r in enumerate(records) if r["event"] == "start"]
+        if not starts:
+            return None
+        records = records[starts[-1] :]
+        start = records[0]
+        if any(r["event"] == "finish" for r in records):
+            return {"finished": True}
+        steps = [r for r in records if r["event"] == "step"]
+        last = steps[-1] if steps else None
+        return {
+            "finished": False,
+            "url": last["url"] if last else start["url"],
+            "parsed_task": start["parsed_task"],
+            "step": last["step"] if last else 0,
+        }
@@ -0,0 +1,305 @@
+from collections.abc import Awaitable, Callable
+from typing import Any, TypedDict, Unpack
+
+from budget import BudgetTracker
+from decision_maker import DecisionMaker
+from element_index import ElementIndex
+from navigator import ActionDict, ElementInfo, Navigator
+from plugins.plugin_manager import PluginManager
+from progress_tracker import ProgressTracker, state_fingerprint
+from task_journal import TaskJournal, redact
+from utils import format_url, get_logger
+
+
+EventCallback = Callable[[str, dict[str, Any]], Awaitable[None]]
+
+
+class TaskOptions(TypedDict, total=False):
+    """Optional settings of one ``execute_task`` run."""
+
+    journal: TaskJournal | None
+    resume: bool
+    budget: BudgetTracker | None
+    on_event: EventCallback | None
+    initial: tuple[str, str] | None
+
+
+logger = get_logger()
+
+
+async def _ignore_event(event_type: str, data: dict[str, Any]) -> None:
+    pass
+
+
+async def _starting_point(
+    task: str,
+    decision_maker: DecisionMaker,
+    journal: TaskJournal | None,
+    *,
+    resume: bool,
+    initial: tuple[str, str] | None,
+) -> dict[str, Any] | None:
+    """Return where the task starts: the journal's resume point, or a freshly parsed task (None if parsing fails)."""
+    resume_point = journal.resume_point() if journal and resume else None
+    if resume_point:
+        if not resume_point["finished"]:
+            logger.info("Resuming task %s from step %s", journal.task_id, resume_point["step"])
+        return resume_point
+
+    url, parsed_task = initial or await decision_maker.analyzer.model_manager.parse_initial_message(task)
+    if not url or not parsed_task:
+        return None
+    url = format_url(url)
+    if journal:
+        journal.append("start", task=task, url=url, parsed_task=parsed_task)
+    return {"finished": False, "url": url, "parsed_task": parsed_task, "step": 0}
+
+
+def _is_password_field(info: ElementInfo | None) -> bool:
+    """Whether an element is a password field, by its input type or, failing that, its label."""
+    if info is None:
+        return False
+    return info.get("input_type") == "password" or "password" in info.get("description", "").lower()
+
+
+def _redact_decision(
+    decision: str,
+    actions: list[ActionDict],
+    mapped_elements: ElementIndex,
+) -> tuple[str, list[ActionDict]]:
+    """Return the decision and actions safe to journal, with text typed into password fields blanked."""
+    journaled_actions = [
+        {**action, "text": "[REDACTED]"}
+        if action["type"] == "input" and _is_password_field(mapped_elements.get(action.get("element")))
+        else action
+        for action in actions
+    ]
+    # The raw decision repeats any typed password, so only log it when nothing was redacted.
+    safe_decision = decision if all(a is b for a, b in zip(actions, journaled_actions, strict=True)) else "[REDACTED]"
+    return safe_decision, journaled_actions
+
+
+async def _update_elements(
+    navigator: Navigator,
+    actions: list[ActionDict],
+    plugin_manager: PluginManager,
+) -> tuple[ElementIndex, str] | None:
+    if any(action["type"] in ("scroll", "next_page") for action in actions):
+        # Reloading would lose the scroll position and any content loaded by scrolling.
+        return await navigator.refresh_elements(plugin_manager)
+    return await navigator.navigate_to(navigator.page.url, plugin_manager)
+
+
+def _judge_outcome(
+    progress: ProgressTracker,
+    actions: list[ActionDict],
+    state_before: str,
+    mapped_elements: ElementIndex,
+    current_url: str,
+) -> str | None:
+    # Typing alone never changes the element map, so only judge steps that should move the page.
+    if all(action["type"] == "input" for action in actions):
+        return None
+    return progress.check_outcome(state_before, state_fingerprint(current_url, mapped_elements))
+
+
+class _TaskRun:
+    """State of one task while it runs, with the phases of the decide-act loop as methods."""
+
+    def __init__(
+        self,
+        navigator: Navigator,
+        decision_maker: DecisionMaker,
+        plugin_manager: PluginManager,
+        start: dict[str, Any],
+        options: TaskOptions,
+    ) -> None:
+        self.navigator = navigator
+        self.decision_maker = decision_maker
+        self.plugin_manager = plugin_manager
+        self.journal = options.get("journal")
+        self.budget = options.get("budget")
+        self.emit = options.get("on_event") or _ignore_event
+        self.parsed_task = start["parsed_task"]
+        self.step = start["step"]
+        self.progress = ProgressTracker(escalate=decision_maker.model_manager.escalate)
+        self.progress_note: str | None = None
+        self.mapped_elements: ElementIndex | None = None
+        self.current_url: str | None = None
+
+    async def open(self, url: str) -> bool:
+        logger.info("Navigating to: %s", url)
+        logger.info("Task: %s", self.parsed_task)
+        try:
+            self.mapped_elements, self.current_url = await self.navigator.navigate_to(url, self.plugin_manager)
+        except Exception:
+            logger.exception("Failed to navigate to %s", url)
+            await self.emit("finished", {"completed": False, "reason": f"Failed to navigate to {url}"})
+            return False
+        await self.emit("started", {"url": self.current_url, "task": self.parsed_task, "step": self.step})
+        return True
+
+    async def _decide(self) -> tuple[str | None, dict[str, Any], str]:
+        """Run the pre-decision hooks and ask for a decision; also return the plugin data and page state."""
+        context = {"url": self.current_url, "elements": self.mapped_elements}
+        await self.plugin_manager.handle_event("pre_decision", context)
+        plugin_data = await self.plugin_manager.pre_decision(context)
+        if self.navigator.prefetcher:
+            # Warm the likely next pages while the model is thinking.
+            await self.navigator.prefetcher.start(self.mapped_elements, self.parsed_task, self.current_url)
+        state = state_fingerprint(self.current_url, self.mapped_elements)
+        decision = await self.decision_maker.make_decision(
+            self.mapped_elements,
+            self.parsed_task,
+            self.current_url,
+            plugin_data,
+            progress_note=self.progress_note,
+        )
+        self.progress_note = None
+        return decision, plugin_data, state
+
+    async def advance(self) -> bool | None:
+        """Run one decide-act step: True if the task completed, False if it must stop, None to continue."""
+        if self.budget and (reason := self.budget.exhausted_reason()):
+            logger.warning("Stopping task: %s", reason)
+            return False
+
+        decision, plugin_data, state = await self._decide()
+        if not decision:
+            return self._without_decision()
+
+        actions = self.decision_maker.parse_decision(decision)
+        safe_decision, journaled_actions = _redact_decision(decision, actions, self.mapped_elements)
+        await self.emit(
+            "decision",
+            {"step": self.step + 1, "decision": safe_decision, "actions": redact(journaled_actions)},
+        )
+        if not actions:
+            logger.info("Task completed or no further actions required")
+            return True
+
+        if reason := self.progress.check_decision(state, decision):
+            # The step is known to lead nowhere, so ask again instead of repeating it.
+            return await self._respond_to_progress(reason)
+
+        context = {"url": self.current_url, "elements": self.mapped_elements}
+        await self.plugin_manager.handle_event("post_decision", {"decision": decision, **context})
+        await self.plugin_manager.post_decision(decision, context)
+
+        if not await self._act(actions):
+            return False
+        self.decision_maker.record_outcome(f"{len(actions)} action(s) performed; now at {self.current_url}")
+        return await self._finish_step(
+            _judge_outcome(self.progress, actions, state, self.mapped_elements, self.current_url),
+            url=self.current_url,
+            decision=safe_decision,
+            actions=journaled_actions,
+            plugin_data=plugin_data,
+        )
+
+    def _without_decision(self) -> bool | None:
+        # The model manager skips calls once the budget is spent; the next step reports that.
+        if self.budget and self.budget.exhausted_reason():
+            return None
+        logger.error("Failed to get a decision from the AI")
+        return False
+
+    async def _act(self, actions: list[ActionDict]) -> bool:
+        """Perform the actions and map the resulting page; False if either fails."""
+        failed_action = await self.navigator.perform_actions(actions, self.mapped_elements, self.plugin_manager)
+        if failed_action:
+            logger.error("Failed to perform action: %s", redact(failed_action))
+            await self.emit("action_failed", {"step": self.step + 1, "action": redact(failed_action)})
+            return False
+
+        result = await _update_elements(self.navigator, actions, self.plugin_manager)
+        if not result:
+            logger.error("Failed to update page elements after actions")
+            return False
+        self.mapped_elements, self.current_url = result
+        return True
+
+    async def _respond_to_progress(self, reason: str | None) -> bool | None:
+        """Act on a progress finding: False if the task must stop, otherwise None with a note queued if needed."""
+        response = self.progress.respond(reason)
+        if not response:
+            return None
+        await self.emit("loop_detected", {"step": self.step + 1, "reason": reason, "response": response})
+        if response == "stop":
+            logger.error("Stopping task: %s", reason)
+            return False
+        self.progress_note = self.progress.note(reason)
+        return None
+
+    async def _finish_step(self, reason: str | None, **record: object) -> bool | None:
+        """Record a performed step, then decide whether the task is done, must stop or goes on."""
+        outcome = await self._respond_to_progress(reason)
+        self.step += 1
+        if self.budget:
+            self.budget.record_step()
+        if self.journal:
+            self.journal.append("step", step=self.step, **record)
+        await self.emit("step", {"step": self.step, "url": self.current_url, "elements": len(self.mapped_elements)})
+
+        if outcome is False:
+            return False
+        if await self.decision_maker.is_task_completed(self.parsed_task, self.current_url):
+            logger.info("Task completed successfully")
+            return True
+        return None
+
+    async def finish(self, *, completed: bool) -> None:
+        if self.navigator.prefetcher:
+            await self.navigator.prefetcher.discard()
+            logger.info(self.navigator.prefetcher.report())
+        logger.info(self.progress.report())
+        if self.journal and completed:
+            self.journal.append("finish", step=self.step, url=self.current_url)
+        if self.budget:
+            logger.info("Task spend:\n%s", self.budget.report())
+        await self.emit("finished", {"completed": completed, "step": self.step, "url": self.current_url})
+        logger.info("Task execution completed")
+
+
+async def execute_task(
+    task: str,
+    navigator: Navigator,
+    decision_maker: DecisionMaker,
+    plugin_manager: PluginManager,
+    **options: Unpack[TaskOptions],
+) -> bool:
+    """
+    Run the decide-act loop for one task and return whether it completed.
+
+    ``journal`` records the steps and, with ``resume``, supplies the point to continue from. ``budget`` limits
+    the run, ``on_event`` receives its progress events and ``initial`` is an already parsed ``(url, task)``
+    pair; when given, the task message is not parsed again.
+    """
+    journal, budget = options.get("journal"), options.get("budget")
+    emit = options.get("on_event") or _ignore_event
+    decision_maker.reset()
+    decision_maker.model_manager.start_budget(budget)
+
+    start = await _starting_point(
+        task,
+        decision_maker,
+        journal,
+        resume=options.get("resume", False),
+        initial=options.get("initial"),
+    )
+    if start is None:
+        logger.error("Failed to parse initial message")
+        await emit("finished", {"completed": False, "reason": "Failed to parse initial message"})
+        return False
+    if start["finished"]:
+        logger.info("Task %s already finished. Nothing to resume.", journal.task_id)
+        return True
+
+    run = _TaskRun(navigator, decision_maker, plugin_manager, start, options)
+    if not await run.open(start["url"]):
+        return False
+    completed = None
+    while completed is None:
+        completed = await run.advance()
+    await run.finish(completed=completed)
+    return completed
@@ -6,7 +6,7 @@ from pathlib import Path
 from typing import Literal
 from urllib.parse import urlparse
 
-import yaml
+from startup_profile import lazy_import
 
 
 # Suppress litellm debug messages
@@ -114,7 +114,12 @@ def extract_domain(url: str) -> str:
 def load_prompt(analyzer_name: str) -> dict:
     prompt_path = Path(__file__).parent.parent / "prompts" / f"{analyzer_name}.yaml"
     with open(prompt_path, "r") as f:
-        return yaml.safe_load(f)
+        return lazy_import("yaml").safe_load(f)
+
+
+def estimate_tokens(text: str) -> int:
+    """Roughly estimate the token count of a text (about four characters per token)."""
+    return len(text) // 4 + 1
 
 
 def format_prompt(prompt: dict, **kwargs) -> dict:
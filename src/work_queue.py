@@ -0,0 +1,277 @@
+import asyncio
+import json
+import multiprocessing
+import os
+import socket
+import sqlite3
+import time
+from contextlib import closing, suppress
+from pathlib import Path
+from typing import Any
+
+from analyzers.text_analyzer import TextAnalyzer
+from budget import BudgetTracker
+from decision_maker import DecisionMaker
+from model_manager import ModelManager
+from navigator import Navigator
+from plugins.plugin_manager import PluginManager
+from session_store import SessionStore
+from task_journal import TaskJournal
+from task_runner import execute_task
+from utils import get_logger, setup_logging
+
+
+logger = get_logger()
+
+POLL_INTERVAL = 2.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    task TEXT NOT NULL,
+    budget TEXT NOT NULL DEFAULT '{}',
+    status TEXT NOT NULL DEFAULT 'queued',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    worker TEXT,
+    lease_until REAL,
+    result TEXT,
+    error TEXT,
+    created_at REAL NOT NULL,
+    finished_at REAL
+)
+"""
+
+
+class WorkQueue:
+    """
+    SQLite-backed task queue shared by worker processes.
+
+    A worker claims a task by taking a lease on it and must renew the lease while it runs.
+    Tasks whose lease expires, because their worker crashed or hung, are handed to the next
+    worker that asks, until they run out of attempts. Results are stored in the same table.
+    """
+
+    def __init__(self, path: str = ".webtalk/queue.db", lease_seconds: float = 120, max_attempts: int = 3) -> None:
+        self.path = Path(path)
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with closing(self._connect()) as db:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute(SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        db.row_factory = sqlite3.Row
+        return db
+
+    def enqueue(self, task: str, budget: dict[str, float] | None = None) -> int:
+        with closing(self._connect()) as db:
+            cursor = db.execute(
+                "INSERT INTO tasks (task, budget, created_at) VALUES (?, ?, ?)",
+                (task, json.dumps(budget or {}), time.time()),
+            )
+            return cursor.lastrowid
+
+    def claim(self, worker: str) -> dict[str, Any] | None:
+        """Lease the oldest runnable task to the worker, or return None if there is none."""
+        now = time.time()
+        with closing(self._connect()) as db:
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                db.execute(
+                    "UPDATE tasks SET status = 'failed', error = 'Lease expired on the last attempt', finished_at = ? "
+                    "WHERE status = 'running' AND lease_until < ? AND attempts >= ?",
+                    (now, now, self.max_attempts),
+                )
+                row = db.execute(
+                    "SELECT id, task, budget, attempts FROM tasks "
+                    "WHERE status = 'queued' OR (status = 'running' AND lease_until < ?) ORDER BY id LIMIT 1",
+                    (now,),
+                ).fetchone()
+                if row:
+                    db.execute(
+                        "UPDATE tasks SET status = 'running', attempts = attempts + 1, worker = ?, lease_until = ? "
+                        "WHERE id = ?",
+                        (worker, now + self.lease_seconds, row["id"]),
+                    )
+                db.execute("COMMIT")
+            except Exception:
+                db.execute("ROLLBACK")
+                raise
+        if not row:
+            return None
+        return {
+            "id": row["id"],
+            "task": row["task"],
+            "budget": json.loads(row["budget"]),
+            "attempt": row["attempts"] + 1,
+            "worker": worker,
+        }
+
+    def heartbeat(self, task_id: int, worker: str) -> bool:
+        """Extend the worker's lease on a task; False means the lease was lost to another worker."""
+        with closing(self._connect()) as db:
+            cursor = db.execute(
+                "UPDATE tasks SET lease_until = ? WHERE id = ? AND worker = ? AND status = 'running'",
+                (time.time() + self.lease_seconds, task_id, worker),
+            )
+            return cursor.rowcount == 1
+
+    def complete(self, task_id: int, worker: str, result: dict[str, Any]) -> None:
+        with closing(self._connect()) as db:
+            db.execute(
+                "UPDATE tasks SET status = 'finished', result = ?, lease_until = NULL, finished_at = ? "
+                "WHERE id = ? AND worker = ? AND status = 'running'",
+                (json.dumps(result, default=str), time.time(), task_id, worker),
+            )
+
+    def release(self, task_id: int, worker: str, error: str) -> None:
+        """Give a task back after an error, retrying it unless it has used up its attempts."""
+        with closing(self._connect()) as db:
+            db.execute(
+                "UPDATE tasks SET status = CASE WHEN attempts < ? THEN 'queued' ELSE 'failed' END, error = ?, "
+                "worker = NULL, lease_until = NULL, "
+                "finished_at = CASE WHEN attempts < ? THEN NULL ELSE ? END "
+                "WHERE id = ? AND worker = ? AND status = 'running'",
+                (self.max_attempts, error, self.max_attempts, time.time(), task_id, worker),
+            )
+
+    def pending(self) -> int:
+        """Count the tasks that are queued or still running."""
+        with closing(self._connect()) as db:
+            return db.execute("SELECT COUNT(*) FROM tasks WHERE status IN ('queued', 'running')").fetchone()[0]
+
+    def results(self) -> list[dict[str, Any]]:
+        with closing(self._connect()) as db:
+            rows = db.execute("SELECT id, task, status, attempts, result, error FROM tasks ORDER BY id").fetchall()
+        return [{**dict(row), "result": json.loads(row["result"]) if row["result"] else None} for row in rows]
+
+
+async def _keep_lease(queue: WorkQueue, task_id: int, worker: str) -> None:
+    """Renew the lease until cancelled, returning if it is lost."""
+    while True:
+        await asyncio.sleep(queue.lease_seconds / 3)
+        if not await asyncio.to_thread(queue.heartbeat, task_id, worker):
+            return
+
+
+async def _run_claimed(
+    queue: WorkQueue,
+    claimed: dict[str, Any],
+    navigator: Navigator,
+    decision_maker: DecisionMaker,
+    plugin_manager: PluginManager,
+) -> None:
+    task_id, task, worker = claimed["id"], claimed["task"], claimed["worker"]
+    logger.info("Worker %s took task %s (attempt %s): %s", worker, task_id, claimed["attempt"], task)
+    budget = BudgetTracker(claimed["budget"])
+    outcome: dict[str, Any] = {}
+
+    async def on_event(event_type: str, data: dict[str, Any]) -> None:
+        if event_type == "finished":
+            outcome.update(data)
+
+    run = asyncio.create_task(
+        execute_task(
+            task,
+            navigator,
+            decision_maker.fork(),
+            plugin_manager,
+            # Keyed by queue row, so identical task texts never share (or resume from) each other's journal.
+            journal=TaskJournal(task, task_id=f"{queue.path.stem}-{task_id}"),
+            # A retry picks up from the journal of the attempt that died.
+            resume=claimed["attempt"] > 1,
+            budget=budget,
+            on_event=on_event,
+        ),
+    )
+    lease = asyncio.create_task(_keep_lease(queue, task_id, worker))
+    await asyncio.wait({run, lease}, return_when=asyncio.FIRST_COMPLETED)
+    if not run.done():
+        logger.warning("Worker %s lost the lease on task %s; abandoning it", worker, task_id)
+        run.cancel()
+        await asyncio.gather(run, return_exceptions=True)
+        return
+    lease.cancel()
+
+    try:
+        completed = run.result()
+    except Exception as e:
+        logger.exception("Task %s crashed on worker %s", task_id, worker)
+        await asyncio.to_thread(queue.release, task_id, worker, str(e))
+        return
+    result = {**outcome, "completed": completed, "tokens": budget.tokens, "cost": budget.cost}
+    await asyncio.to_thread(queue.complete, task_id, worker, result)
+
+
+async def _work(queue_path: str, worker: str, options: dict[str, Any]) -> None:
+    queue = WorkQueue(queue_path)
+    model_manager = ModelManager.initialize(model_provider=options["model"])
+    # Every task runs on a fork of this, so no analyzer state carries over between tasks.
+    decision_maker = DecisionMaker(
+        model_manager,
+        TextAnalyzer(model_manager, conversational=options["conversational"]),
+        options["verbose"],
+    )
+    navigator = Navigator(
+        headless=True,
+        detection_method=options["method"],
+        session_store=SessionStore() if options["persist_session"] else None,
+    )
+    navigator.start()
+    plugin_manager = PluginManager("src/plugins", "config/plugins.json")
+    try:
+        async with navigator:
+            await asyncio.gather(plugin_manager.load_plugins(), asyncio.to_thread(model_manager.warm_up))
+            while True:
+                claimed = await asyncio.to_thread(queue.claim, worker)
+                if not claimed:
+                    # Tasks running elsewhere may still come back if their worker dies.
+                    if not await asyncio.to_thread(queue.pending):
+                        break
+                    await asyncio.sleep(POLL_INTERVAL)
+                    continue
+                await _run_claimed(queue, claimed, navigator, decision_maker, plugin_manager)
+                await navigator.recycle()
+    finally:
+        await plugin_manager.cleanup_plugins()
+    logger.info("Worker %s found no more tasks", worker)
+
+
+def run_worker(queue_path: str, options: dict[str, Any]) -> None:
+    """Entry point of a worker process: run queued tasks with its own browser until the queue is empty."""
+    setup_logging(options["verbose"], options["quiet"])
+    # Unique across machines sharing the queue, so leases are never confused between workers.
+    worker = f"{socket.gethostname()}-{os.getpid()}"
+    with suppress(KeyboardInterrupt):
+        asyncio.run(_work(queue_path, worker, options))
+
+
+async def run_workers(queue: WorkQueue, workers: int, options: dict[str, Any], max_restarts: int = 3) -> None:
+    """Run worker processes until the queue drains, replacing workers that crash while work remains."""
+    context = multiprocessing.get_context("spawn")
+    restarts = 0
+
+    def spawn(number: int) -> multiprocessing.Process:
+        process = context.Process(
+            target=run_worker,
+            args=(str(queue.path), options),
+            name=f"webtalk-worker-{number}",
+        )
+        process.start()
+        return process
+
+    processes = {number: spawn(number) for number in range(workers)}
+    logger.info("Started %s worker processes on %s", workers, queue.path)
+    while processes:
+        await asyncio.sleep(1)
+        for number, process in list(processes.items()):
+            if process.is_alive():
+                continue
+            process.join()
+            del processes[number]
+            if process.exitcode != 0 and restarts < max_restarts and await asyncio.to_thread(queue.pending):
+                restarts += 1
+                logger.warning("Worker %s exited with code %s; starting a replacement", number, process.exitcode)
+                processes[number] = spawn(number)
@@ -0,0 +1,80 @@
+import asyncio
+
+from element_index import ElementIndex
+from navigator import ElementInfo, Navigator
+
+
+STEPS = 100
+ELEMENTS_PER_PAGE = 20
+
+
+class FakeHandle:
+    """Stands in for a Playwright ElementHandle and tracks whether it is still alive."""
+
+    def __init__(self, live: set["FakeHandle"]) -> None:
+        self.live = live
+        self.dispose_calls = 0
+        live.add(self)
+
+    async def dispose(self) -> None:
+        self.dispose_calls += 1
+        self.live.discard(self)
+
+
+def make_map(live: set[FakeHandle]) -> ElementIndex:
+    return ElementIndex(
+        {
+            number: ElementInfo(
+                FakeHandle(live),
+                {"x": 0, "y": 0, "width": 1, "height": 1},
+                "clickable",
+                f"Link {number}",
+            )
+            for number in range(1, ELEMENTS_PER_PAGE + 1)
+        },
+    )
+
+
+def test_superseded_maps_release_their_handles() -> None:
+    navigator = Navigator(headless=True)
+    live: set[FakeHandle] = set()
+    maps = []
+
+    async def run_session() -> None:
+        for _ in range(STEPS):
+            maps.append(await navigator._set_live_elements(make_map(live)))
+            # Re-publishing the current map must not dispose it.
+            await navigator._set_live_elements(maps[-1])
+
+    asyncio.run(run_session())
+
+    assert len(live) == ELEMENTS_PER_PAGE
+    assert live == {info["element"] for info in maps[-1].values()}
+    for mapped_elements in maps[:-1]:
+        assert all(info["element"].dispose_calls == 1 for info in mapped_elements.values())
+    assert all(info["element"].dispose_calls == 0 for info in maps[-1].values())
+
+
+def test_unlabelled_elements_are_released_while_mapping() -> None:
+    navigator = Navigator(headless=True)
+    live: set[FakeHandle] = set()
+    descriptions = ["Search", "No description", "Sign in", "  No description  ", "Cart"]
+    elements = [
+        {
+            "element": FakeHandle(live),
+            "bbox": {"x": 0, "y": 0, "width": 1, "height": 1},
+            "tag": "a",
+            "type": None,
+            "is_dropdown": False,
+            "description": description,
+        }
+        for description in descriptions
+    ]
+
+    mapped = asyncio.run(navigator._map_elements(elements))
+
+    assert [info["description"] for info in mapped.values()] == ["Search", "Sign in", "Cart"]
+    assert live == {info["element"] for info in mapped.values()}
+    for element, description in zip(elements, descriptions, strict=True):
+        expected_calls = 1 if description.strip() == "No description" else 0
+        assert element["element"].dispose_calls == expected_calls
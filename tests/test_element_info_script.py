@@ -0,0 +1,53 @@
+import asyncio
+import json
+import shutil
+import subprocess
+
+import pytest
+
+from navigator import ELEMENT_INFO_SCRIPT, Navigator
+
+
+# Minimal DOM for the script: links with the given rel values and no labels on the page.
+HARNESS = """
+const document = {querySelectorAll: () => []};
+const window = {getComputedStyle: () => ({visibility: 'visible'})};
+const link = (text, rel) => ({
+    tagName: 'A',
+    href: 'https://example.com/' + text.toLowerCase(),
+    rel: rel,
+    innerText: text,
+    getBoundingClientRect: () => ({x: 0, y: 0, width: 10, height: 10}),
+    getAttribute: (name) => (name === 'rel' ? rel : null),
+});
+const elements = [link('Plain', ''), link('Sponsored', 'sponsored nofollow'), link('Nofollowers', 'nofollowers')];
+console.log(JSON.stringify((%s)(elements)));
+"""
+
+
+NODE = shutil.which("node")
+
+
+class FakeHandle:
+    async def dispose(self) -> None:
+        pass
+
+
+@pytest.mark.skipif(NODE is None, reason="needs node to run the page script")
+def test_nofollow_links_are_mapped_without_href() -> None:
+    output = subprocess.run(
+        [NODE, "-e", HARNESS % ELEMENT_INFO_SCRIPT],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    infos = [{**info, "element": FakeHandle()} for info in json.loads(output)]
+
+    mapped = asyncio.run(Navigator(headless=True)._map_elements(infos))
+
+    hrefs = {info["description"]: info["href"] for info in mapped.values()}
+    assert hrefs == {
+        "Plain": "https://example.com/plain",
+        "Sponsored": None,
+        "Nofollowers": "https://example.com/nofollowers",
+    }
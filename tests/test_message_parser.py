@@ -0,0 +1,53 @@
+import pytest
+
+from message_parser import _strip_navigation, parse_message_locally
+
+
+PARSED = [
+    ("Go to https://example.com/login and sign in", ("https://example.com/login", "Sign in")),
+    ("Check the price at https://shop.example.com/item?id=3.", ("https://shop.example.com/item?id=3", None)),
+    ("go to amazon.com and search for headphones", ("amazon.com", "Search for headphones")),
+    ("Visit www.python.org, then open the downloads page", ("www.python.org", "Open the downloads page")),
+    ("go to the google homepage", ("google.com", "go to the google homepage")),
+    ("Navigate to YouTube and play a lofi playlist", ("youtube.com", "Play a lofi playlist")),
+    ("search for a toaster on amazon", ("amazon.com", "search for a toaster on amazon")),
+    ("open stack overflow website and then search asyncio", ("stackoverflow.com", "Search asyncio")),
+    ("go to amazon and say hi to support@ebay.com", ("amazon.com", "Say hi to support@ebay.com")),
+    ("go to github.com, the github homepage", ("github.com", "The github homepage")),
+]
+
+UNPARSED = [
+    "search for the weather",
+    "I love amazon",
+    "compare prices on amazon and ebay",
+    "go to amazon.com and then ebay.com",
+    "email someone@example.com about the invoice",
+    "go to stackoverflow and search ASP.NET",
+    "go to google and open youtube.com",
+]
+
+
+@pytest.mark.parametrize(("message", "expected"), PARSED)
+def test_parses_single_site_messages(message: str, expected: tuple[str, str | None]) -> None:
+    url, task = expected
+    assert parse_message_locally(message) == (url, task or message)
+
+
+@pytest.mark.parametrize("message", UNPARSED)
+def test_defers_to_the_model(message: str) -> None:
+    assert parse_message_locally(message) is None
+
+
+@pytest.mark.parametrize(
+    ("message", "site", "task"),
+    [
+        ("Go to amazon and buy socks", "amazon", "Buy socks"),
+        ("please head to the amazon website, then buy socks", "amazon", "Buy socks"),
+        ("visit Google's home page and search cats", "google", "Search cats"),
+        ("open the google homepage", "google", "open the google homepage"),
+        ("go to googleplex and look around", "google", "go to googleplex and look around"),
+        ("buy socks on amazon", "amazon", "buy socks on amazon"),
+    ],
+)
+def test_strip_navigation(message: str, site: str, task: str) -> None:
+    assert _strip_navigation(message, site) == task
@@ -0,0 +1,81 @@
+import asyncio
+import json
+from collections.abc import Callable, Mapping
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+import plugins
+from element_index import ElementIndex
+from navigator import ElementInfo
+from plugins.bitwarden import BitwardenPlugin
+from plugins.plugin_manager import PluginManager
+
+
+DESCRIPTIONS = {
+    1: ("input", "Credit card number"),
+    2: ("input", "E-mail address"),
+    3: ("clickable", "Sign in"),
+}
+
+MATCHING = [["credit card"], ["e-mail"], ["E-Mail Address"], ["card"], ["input"]]
+NOT_MATCHING = [["password"], ["card sign"], ["dropdown"]]
+
+
+def as_index() -> ElementIndex:
+    bbox = {"x": 0, "y": 0, "width": 1, "height": 1}
+    return ElementIndex(
+        {number: ElementInfo(None, bbox, kind, description) for number, (kind, description) in DESCRIPTIONS.items()},
+    )
+
+
+def as_dict() -> dict[int, dict[str, str]]:
+    return {number: {"type": kind, "description": description} for number, (kind, description) in DESCRIPTIONS.items()}
+
+
+BUILDERS = pytest.mark.parametrize("build", [as_index, as_dict], ids=["index", "dict"])
+
+
+def matches(keywords: list[str], elements: Mapping[int, Any]) -> bool:
+    return PluginManager._matches({"element_keywords": keywords}, "pre_decision", {"elements": elements})
+
+
+@BUILDERS
+@pytest.mark.parametrize("keywords", MATCHING)
+def test_element_keywords_match(build: Callable[[], Mapping[int, Any]], keywords: list[str]) -> None:
+    assert matches(keywords, build())
+
+
+@BUILDERS
+@pytest.mark.parametrize("keywords", NOT_MATCHING)
+def test_element_keywords_do_not_match(build: Callable[[], Mapping[int, Any]], keywords: list[str]) -> None:
+    assert not matches(keywords, build())
+
+
+def test_class_triggers_defer_initialization(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    initialized = []
+
+    async def initialize(self: BitwardenPlugin) -> None:
+        initialized.append(self)
+
+    monkeypatch.setattr(BitwardenPlugin, "initialize", initialize)
+    config_file = tmp_path / "plugins.json"
+    config_file.write_text(json.dumps({"bitwarden": {"enabled": True}}))
+    manager = PluginManager(str(Path(plugins.__file__).parent), str(config_file))
+
+    async def run() -> None:
+        await manager.load_plugins()
+        assert manager.pending == {"bitwarden": BitwardenPlugin.triggers}
+        assert not initialized
+
+        assert await manager._plugins_for("pre_decision", {"elements": as_dict()}) == []
+        assert not initialized
+
+        login = {1: {"type": "input", "description": "Password"}}
+        activated = await manager._plugins_for("pre_decision", {"elements": login})
+        assert activated == initialized
+        assert len(initialized) == 1
+        assert not manager.pending
+
+    asyncio.run(run())
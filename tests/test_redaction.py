@@ -0,0 +1,34 @@
+from element_index import ElementIndex
+from navigator import ElementInfo
+from task_runner import _redact_decision
+
+
+BBOX = {"x": 0, "y": 0, "width": 1, "height": 1}
+
+
+def test_text_typed_into_password_inputs_is_redacted() -> None:
+    elements = ElementIndex(
+        {
+            1: ElementInfo(None, BBOX, "input", "Username", input_type="text"),
+            # Labelled without the word "password", so only the input type gives it away.
+            2: ElementInfo(None, BBOX, "input", "PIN", input_type="password"),
+            3: ElementInfo(None, BBOX, "input", "Password"),
+        },
+    )
+    actions = [
+        {"type": "input", "element": 1, "text": "alice"},
+        {"type": "input", "element": 2, "text": "1234"},
+        {"type": "input", "element": 3, "text": "hunter2"},
+    ]
+
+    decision, journaled = _redact_decision("Input 1 alice; Input 2 1234; Input 3 hunter2", actions, elements)
+
+    assert decision == "[REDACTED]"
+    assert [action["text"] for action in journaled] == ["alice", "[REDACTED]", "[REDACTED]"]
+
+
+def test_decisions_without_password_fields_are_kept() -> None:
+    elements = ElementIndex({1: ElementInfo(None, BBOX, "input", "Search", input_type="search")})
+    actions = [{"type": "input", "element": 1, "text": "shoes"}]
+
+    assert _redact_decision("Input 1 shoes", actions, elements) == ("Input 1 shoes", actions)
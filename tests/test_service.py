@@ -0,0 +1,67 @@
+import asyncio
+
+import pytest
+
+import service
+from service import AgentService
+
+
+class FakeNavigator:
+    def __init__(self, name: str, log: list[str]) -> None:
+        self.name = name
+        self.log = log
+
+    async def recycle(self) -> None:
+        self.log.append(f"recycle {self.name}")
+
+    async def cleanup(self) -> None:
+        self.log.append(f"cleanup {self.name}")
+
+
+class FakePluginManager:
+    def __init__(self, log: list[str]) -> None:
+        self.log = log
+
+    async def cleanup_plugins(self) -> None:
+        self.log.append("cleanup plugins")
+
+
+class FakeDecisionMaker:
+    model_manager = None
+
+    def fork(self) -> "FakeDecisionMaker":
+        return self
+
+
+def test_stop_cancels_running_tasks_before_cleaning_up(monkeypatch: pytest.MonkeyPatch) -> None:
+    log: list[str] = []
+    started = asyncio.Event()
+
+    async def execute_task(task: str, *_args: object, **_options: object) -> bool:
+        started.set()
+        try:
+            await asyncio.Event().wait()
+        except asyncio.CancelledError:
+            log.append(f"cancel {task}")
+            raise
+        return True
+
+    monkeypatch.setattr(service, "execute_task", execute_task)
+
+    async def run() -> None:
+        agent = AgentService(FakeNavigator("host", log), FakeDecisionMaker(), FakePluginManager(log))
+        task_navigator = FakeNavigator("task", log)
+
+        async def acquire_navigator() -> FakeNavigator:
+            return task_navigator
+
+        monkeypatch.setattr(agent, "_acquire_navigator", acquire_navigator)
+        agent.submit("buy socks")
+        await started.wait()
+
+        await agent.stop()
+
+        assert not agent._workers
+        assert log == ["cancel buy socks", "recycle task", "cleanup task", "cleanup plugins", "cleanup host"]
+
+    asyncio.run(run())
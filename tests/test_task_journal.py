@@ -0,0 +1,90 @@
+import asyncio
+from pathlib import Path
+
+from task_journal import TaskJournal
+from task_runner import execute_task
+
+
+class FakeModelManager:
+    def start_budget(self, budget: object) -> None:
+        pass
+
+    async def parse_initial_message(self, message: str) -> tuple[str, str]:
+        msg = f"A resumed task must not be parsed again: {message}"
+        raise AssertionError(msg)
+
+
+class FakeDecisionMaker:
+    def __init__(self) -> None:
+        self.model_manager = FakeModelManager()
+
+    def reset(self) -> None:
+        pass
+
+
+def make_journal(tmp_path: Path) -> TaskJournal:
+    return TaskJournal("buy socks", journal_dir=str(tmp_path))
+
+
+def test_resume_reads_only_the_latest_run(tmp_path: Path) -> None:
+    journal = make_journal(tmp_path)
+    journal.append("start", task="buy socks", url="https://old.example", parsed_task="Old task")
+    journal.append("step", step=1, url="https://old.example/1")
+    journal.append("step", step=2, url="https://old.example/2")
+    journal.append("start", task="buy socks", url="https://new.example", parsed_task="New task")
+    journal.append("step", step=1, url="https://new.example/cart")
+
+    assert journal.resume_point() == {
+        "finished": False,
+        "url": "https://new.example/cart",
+        "parsed_task": "New task",
+        "step": 1,
+    }
+
+
+def test_a_fresh_run_without_steps_resumes_from_its_start(tmp_path: Path) -> None:
+    journal = make_journal(tmp_path)
+    journal.append("start", task="buy socks", url="https://old.example", parsed_task="Old task")
+    journal.append("step", step=1, url="https://old.example/1")
+    journal.append("finish", step=1, url="https://old.example/1")
+    journal.append("start", task="buy socks", url="https://new.example", parsed_task="New task")
+    # A crash mid-write leaves a torn last line behind.
+    with journal.path.open("a") as f:
+        f.write('{"event": "st')
+
+    assert journal.resume_point() == {
+        "finished": False,
+        "url": "https://new.example",
+        "parsed_task": "New task",
+        "step": 0,
+    }
+
+
+def test_a_finished_run_is_not_resumed(tmp_path: Path) -> None:
+    journal = make_journal(tmp_path)
+    journal.append("start", task="buy socks", url="https://example.com", parsed_task="Buy socks")
+    journal.append("step", step=1, url="https://example.com/cart")
+    journal.append("finish", step=1, url="https://example.com/cart")
+    assert journal.resume_point() == {"finished": True}
+
+    events = []
+
+    async def on_event(event_type: str, data: dict[str, object]) -> None:
+        events.append((event_type, data))
+
+    # Neither the navigator nor the model may be touched when there is nothing left to do.
+    completed = asyncio.run(
+        execute_task(
+            "buy socks",
+            None,
+            FakeDecisionMaker(),
+            None,
+            journal=journal,
+            resume=True,
+            on_event=on_event,
+        ),
+    )
+
+    assert completed is True
+    assert events == []
+    assert [record["event"] for record in journal.records()] == ["start", "step", "finish"]
@@ -0,0 +1,96 @@
+import time
+from pathlib import Path
+
+import pytest
+
+from work_queue import WorkQueue
+
+
+LEASE = 60.0
+MAX_ATTEMPTS = 2
+
+
+class Clock:
+    """Replaces time.time so that leases can expire without waiting."""
+
+    def __init__(self) -> None:
+        self.now = 1_000_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float) -> None:
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> Clock:
+    clock = Clock()
+    monkeypatch.setattr(time, "time", clock)
+    return clock
+
+
+def make_queue(tmp_path: Path) -> WorkQueue:
+    return WorkQueue(str(tmp_path / "queue.db"), lease_seconds=LEASE, max_attempts=MAX_ATTEMPTS)
+
+
+def test_expired_lease_is_reclaimed_by_another_worker(tmp_path: Path, clock: Clock) -> None:
+    queue = make_queue(tmp_path)
+    task_id = queue.enqueue("buy socks", {"steps": 10})
+
+    first = queue.claim("worker-1")
+    assert first == {"id": task_id, "task": "buy socks", "budget": {"steps": 10}, "attempt": 1, "worker": "worker-1"}
+    assert queue.claim("worker-2") is None
+
+    clock.advance(LEASE / 2)
+    assert queue.heartbeat(task_id, "worker-1")
+    clock.advance(LEASE / 2 + 1)
+    # The heartbeat renewed the lease, so it has not run out yet.
+    assert queue.claim("worker-2") is None
+
+    clock.advance(LEASE)
+    second = queue.claim("worker-2")
+    assert second is not None
+    assert (second["id"], second["attempt"], second["worker"]) == (task_id, 2, "worker-2")
+
+    # The first worker lost its lease: its heartbeat fails and its result is ignored.
+    assert not queue.heartbeat(task_id, "worker-1")
+    queue.complete(task_id, "worker-1", {"completed": False})
+    assert queue.pending() == 1
+
+    queue.complete(task_id, "worker-2", {"completed": True})
+    assert queue.pending() == 0
+    [row] = queue.results()
+    assert (row["status"], row["attempts"], row["result"]) == ("finished", 2, {"completed": True})
+
+
+def test_lease_expiring_on_the_last_attempt_fails_the_task(tmp_path: Path, clock: Clock) -> None:
+    queue = make_queue(tmp_path)
+    task_id = queue.enqueue("buy socks")
+
+    assert queue.claim("worker-1")["attempt"] == 1
+    clock.advance(LEASE + 1)
+    assert queue.claim("worker-2")["attempt"] == MAX_ATTEMPTS
+    clock.advance(LEASE + 1)
+
+    assert queue.claim("worker-3") is None
+    assert not queue.heartbeat(task_id, "worker-2")
+    assert queue.pending() == 0
+    [row] = queue.results()
+    assert (row["status"], row["attempts"], row["error"]) == ("failed", 2, "Lease expired on the last attempt")
+
+
+@pytest.mark.usefixtures("clock")
+def test_released_tasks_are_retried_until_out_of_attempts(tmp_path: Path) -> None:
+    queue = make_queue(tmp_path)
+    task_id = queue.enqueue("buy socks")
+
+    queue.claim("worker-1")
+    queue.release(task_id, "worker-1", "browser crashed")
+    assert queue.results()[0]["status"] == "queued"
+
+    assert queue.claim("worker-2")["attempt"] == MAX_ATTEMPTS
+    queue.release(task_id, "worker-2", "browser crashed again")
+    [row] = queue.results()
+    assert (row["status"], row["error"]) == ("failed", "browser crashed again")
+    assert queue.claim("worker-3") is None